@@ -1,11 +1,21 @@
+import collections
+import contextlib
+import functools
 import os
+import queue
+import threading
+import time
 import traceback
-from tkinter import filedialog
 
-from moviepy import VideoFileClip
+from sqlalchemy import bindparam, delete, func, insert, or_, select, update
+from sqlalchemy.orm import selectinload
 
+import database
 from database import (
+    count_queries,
+    create_db_and_tables,
     get_db_session,
+    run_migrations,
     Course,
     Chapter,
     Video,
@@ -13,35 +23,302 @@ from database import (
     Schedule,
     DailySchedule,
     ScheduleTask,
+    ProbeCacheEntry,
+    ProbeStatusEnum,
+    refresh_progress_aggregates,
 )
+from scheduler import (
+    SCHEDULE_MODE_CHAPTERS, SCHEDULE_MODE_SPLIT, SCHEDULE_MODES, ScheduleInput, minimum_daily_minutes, minimum_days,
+    schedule_balanced, schedule_split
+)
+from diagnostics import OperationTrace, append_to_log, profiled
+from video_probe import probe_duration
 
 # Supported video file extensions (case-insensitive)
 VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.avi', '.mov', '.flv', '.wmv')
+# Common subtitle extensions, in order of preference
+SUBTITLE_EXTENSIONS = ('.srt', '.vtt', '.ass')
+
+# Seconds to wait for a single video probe before treating it as failed
+DEFAULT_PROBE_TIMEOUT_SECONDS = 30
+# How often (seconds) a scan waiting on probes checks for finished, started and timed-out probes and for cancel
+PROBE_POLL_INTERVAL_SECONDS = 0.1
+# Rows deleted per statement by id (SQLite limits the bound parameters of one statement)
+DELETE_BATCH_SIZE = 10000
+# Yielded by _run_header_probes for a file whose probe exceeded the timeout
+_PROBE_TIMED_OUT = object()
+
+# Chapter and course columns that a progress change updates (see _apply_progress_change)
+PROGRESS_AGGREGATE_COLUMNS = ['watched_seconds', 'watched_video_count', 'partially_watched_video_count']
+
+# Every traced operation is appended to this file (JSON lines); defaults to a file next to the database
+DIAGNOSTICS_LOG_ENV_VAR = "COURSE_SCHEDULER_DIAGNOSTICS_LOG"
+
+
+class ScanCancelledError(Exception):
+    """Raised inside a scan when the user cancels it; the scan's transaction is rolled back."""
+
+
+def _traced(operation_name):
+    """Method decorator: runs the call as one traced operation (see VideoSchedulerAppLogic._operation)."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self._operation(operation_name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
 
 
 class VideoSchedulerAppLogic:
-    def __init__(self):
+    def __init__(self, probe_workers=None, probe_timeout=DEFAULT_PROBE_TIMEOUT_SECONDS):
         self.db_session = get_db_session()
         self.current_course = None
         self.gui_callbacks = {}  # To call GUI update functions
+        # Number of processes used to probe videos during scans (None = one per CPU, 1 = no pool)
+        self.probe_workers = probe_workers
+        self.probe_timeout = probe_timeout
+
+        # Scans run on a worker thread when enabled (the GUI must then call process_gui_queue periodically)
+        self.background_scans = False
+        self._main_thread = threading.current_thread()
+        self._gui_queue = queue.Queue()  # (function, args) to run on the main thread
+        self._scan_thread = None
+        self._scan_cancel_event = threading.Event()
+
+        # Unwatched videos of the current course as a ScheduleInput; rebuilt whenever the course graph is reloaded
+        self._schedule_input = None
+        self._schedule_input_course_id = None
+
+        # Diagnostics: the operation being traced on each thread, and the last finished one
+        self._trace_local = threading.local()
+        self.last_trace = None
+        self.profile_next_operation = False  # Set to run the next operation under cProfile
+        self.diagnostics_log_path = None  # None: $COURSE_SCHEDULER_DIAGNOSTICS_LOG, else next to the database
+
+    @staticmethod
+    def initialize_database():
+        """Creates missing tables and applies pending schema migrations."""
+        create_db_and_tables()  # Ensure database and tables exist
+        run_migrations()  # Upgrade databases created by older versions in place
 
     def register_gui_callbacks(self, **callbacks):
         """Registers callback functions for updating the GUI."""
         self.gui_callbacks = callbacks
 
     def _call_gui_callback(self, callback_name, *args):
-        """Calls a specific GUI callback if it exists."""
+        """
+        Calls a specific GUI callback if it exists.
+        Safe to call from worker threads: the call is then queued for the main thread.
+        """
+        if threading.current_thread() is not self._main_thread:
+            self._gui_queue.put((self._call_gui_callback, (callback_name,) + args))
+            return
         if callback_name in self.gui_callbacks and callable(self.gui_callbacks[callback_name]):
-            self.gui_callbacks[callback_name](*args)
+            with self._span("GUI callbacks"):
+                self.gui_callbacks[callback_name](*args)
+
+    # --- Diagnostics ---
+
+    @contextlib.contextmanager
+    def _operation(self, name):
+        """
+        Traces one high-level operation running on this thread: phase timings, counters, the SQL
+        statements it ran (see database.count_queries) and, if profile_next_operation is set,
+        a cProfile capture. An operation started inside another one is folded into it.
+        The finished trace, including those of failed or cancelled operations, becomes last_trace,
+        is appended to the diagnostics log and is sent to the GUI's Diagnostics panel.
+        """
+        if getattr(self._trace_local, 'trace', None) is not None:
+            yield self._trace_local.trace
+            return
+        trace = OperationTrace(name)
+        profile, self.profile_next_operation = self.profile_next_operation, False
+        self._trace_local.trace = trace
+        with count_queries() as query_stats:
+            try:
+                with profiled(trace) if profile else contextlib.nullcontext():
+                    yield trace
+            except Exception as e:
+                trace.error = str(e)
+                raise
+            finally:
+                self._trace_local.trace = None
+                trace.finish()
+                # Time spent inside SQL statements, across all phases
+                trace.add_time("SQL statements", query_stats.seconds, calls=query_stats.statements)
+                trace.count("SQL statements", query_stats.statements)
+                if query_stats.slow_statements:
+                    trace.count("slow SQL statements", query_stats.slow_statements)
+                self._publish_trace(trace)
+
+    def _publish_trace(self, trace):
+        """
+        Stores a finished trace as last_trace, logs it and shows it in the Diagnostics panel.
+        Runs while an operation's error may be propagating, so it never raises.
+        """
+        self.last_trace = trace
+        try:
+            append_to_log(trace, self.get_diagnostics_log_path())
+            self._call_gui_callback("update_diagnostics", trace)
+        except Exception as e:
+            print(f"Error publishing the diagnostics of '{trace.name}': {e}")
+            traceback.print_exc()
+
+    def _span(self, phase):
+        """Times a phase of the operation running on this thread (does nothing outside an operation)."""
+        trace = getattr(self._trace_local, 'trace', None)
+        return trace.span(phase) if trace is not None else contextlib.nullcontext()
+
+    def _add_time(self, phase, seconds):
+        """Adds a separately measured duration to a phase of the operation running on this thread."""
+        trace = getattr(self._trace_local, 'trace', None)
+        if trace is not None:
+            trace.add_time(phase, seconds)
+
+    def _count(self, counter, amount=1):
+        """Adds to a counter of the operation running on this thread."""
+        trace = getattr(self._trace_local, 'trace', None)
+        if trace is not None and amount:
+            trace.count(counter, amount)
+
+    def _note_error(self, error):
+        """Records an error the operation handled itself (and so did not propagate)."""
+        trace = getattr(self._trace_local, 'trace', None)
+        if trace is not None:
+            trace.error = str(error)
+
+    def get_diagnostics_log_path(self):
+        """File the traced operations are appended to (one JSON object per line)."""
+        if self.diagnostics_log_path:
+            return self.diagnostics_log_path
+        return (os.environ.get(DIAGNOSTICS_LOG_ENV_VAR)
+                or os.path.splitext(database.database_path)[0] + "_diagnostics.log")
+
+    def _flush(self, session):
+        """session.flush(), timed, with the pending ORM inserts and updates counted."""
+        self._count("rows inserted", len(session.new))
+        self._count("rows updated", len(session.dirty))
+        with self._span("ORM flush"):
+            session.flush()
+
+    def _commit(self, session):
+        """session.commit(), timed, with the ORM inserts and updates it flushes counted."""
+        self._count("rows inserted", len(session.new))
+        self._count("rows updated", len(session.dirty))
+        with self._span("commit"):
+            session.commit()
+
+    def _bulk_update(self, session, model, rows):
+        """
+        Updates rows of `model`'s table with one executemany UPDATE. Each row dict holds the
+        primary key as 'row_id' and the new column values; all rows must set the same columns.
+        """
+        if not rows:
+            return
+        with self._span("bulk update"):
+            session.execute(update(model.__table__).where(model.__table__.c.id == bindparam('row_id')), rows)
+        self._count("rows updated", len(rows))
+
+    def _bulk_insert(self, session, model, rows):
+        """Inserts `rows` (dicts) into `model`'s table with one executemany INSERT."""
+        if not rows:
+            return
+        # A Core insert: the ORM form drops None-valued keys, splitting rows with and without e.g. a
+        # subtitle into separate statements instead of one executemany
+        with self._span("bulk insert"):
+            session.execute(insert(model.__table__), rows)
+        self._count("rows inserted", len(rows))
+
+    def _run_on_main_thread(self, function, *args):
+        """Runs `function` now if on the main thread, otherwise queues it for process_gui_queue."""
+        if threading.current_thread() is self._main_thread:
+            function(*args)
+        else:
+            self._gui_queue.put((function, args))
+
+    def process_gui_queue(self):
+        """Runs the GUI updates queued by worker threads. Must be called from the main (Tk) thread."""
+        while True:
+            try:
+                function, args = self._gui_queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                function(*args)
+            except Exception as e:
+                print(f"Error in queued GUI update: {e}")
+                traceback.print_exc()
+
+    def is_scan_running(self):
+        """Returns True while a background scan is in progress."""
+        return self._scan_thread is not None and self._scan_thread.is_alive()
+
+    def cancel_scan(self):
+        """Asks the running scan to stop; its changes are rolled back."""
+        if self.is_scan_running():
+            self._scan_cancel_event.set()
+            self._call_gui_callback("update_progress", None, "Cancelling scan...")
+
+    def _check_scan_cancelled(self):
+        """Raises ScanCancelledError if the user cancelled the running scan."""
+        if self._scan_cancel_event.is_set():
+            raise ScanCancelledError("Scan cancelled by user.")
+
+    def _start_scan_job(self, operation_name, job, on_finished):
+        """
+        Runs `job(session)` in its own session and transaction, on a worker thread when background
+        scans are enabled, traced as the operation `operation_name`.
+        The transaction is committed on success and rolled back on error or cancel.
+        `on_finished(result, error)` is then called on the main thread.
+        """
+        if self.is_scan_running():
+            self._call_gui_callback("show_message", "A scan is already running.", "warning")
+            return
+        self._scan_cancel_event.clear()
+
+        def run():
+            session = get_db_session()
+            result, error = None, None
+            try:
+                with self._operation(operation_name):
+                    result = job(session)
+                    self._commit(session)
+            except Exception as e:
+                session.rollback()
+                error = e
+                if not isinstance(e, ScanCancelledError):
+                    traceback.print_exc()
+                self._call_gui_callback("hide_progress_dialog")
+            finally:
+                session.close()
+            self._run_on_main_thread(on_finished, result, error)
+
+        if self.background_scans:
+            self._scan_thread = threading.Thread(target=run, name="course-scan", daemon=True)
+            self._scan_thread.start()
+        else:
+            run()
 
     @staticmethod
     def get_video_duration(video_path):
         """
-        Extracts video duration using MoviePy.
+        Extracts video duration from the container metadata, falling back to MoviePy
+        only for files the fast probe cannot parse.
         Returns duration in seconds (float) or None on error.
         """
+        duration = probe_duration(video_path)
+        if duration is not None:
+            return duration
+        print(f"Fast probe failed, falling back to MoviePy for: {video_path}")
+        return VideoSchedulerAppLogic.moviepy_duration(video_path)
+
+    @staticmethod
+    def moviepy_duration(video_path):
+        """Reads the duration by opening the video with MoviePy (slow). Returns seconds (float) or None on error."""
         try:
-            print(f"Attempting to get duration for: {video_path}")
+            # Imported here: MoviePy is slow to import and only needed for files the fast probe cannot read
+            from moviepy import VideoFileClip
             # Using a context manager for VideoFileClip is good practice
             with VideoFileClip(video_path) as clip:
                 duration = clip.duration
@@ -61,29 +338,285 @@ class VideoSchedulerAppLogic:
     def find_subtitle(video_path):
         """Finds a subtitle file with the same base name as the video."""
         base, _ = os.path.splitext(video_path)
-        for sub_ext in ['.srt', '.vtt', '.ass']:  # Common subtitle extensions
+        for sub_ext in SUBTITLE_EXTENSIONS:
             subtitle_file = base + sub_ext
             if os.path.exists(subtitle_file):
                 return subtitle_file
         return None
 
-    def select_and_load_course(self):
-        """Handles course selection via dialog and loads or creates it."""
-        directory_path = filedialog.askdirectory(title="Select Main Course Folder")
-        if not directory_path:
-            return  # User cancelled
+    def _probe_videos(self, session, directory_path, video_items, progress_start=0.0, progress_end=1.0,
+                      force_reprobe=False):
+        """
+        Returns a {'duration', 'cached'} dict for every video item found under `directory_path`, in the same order.
+        Files whose size, mtime and inode match the probe cache are not probed again;
+        the rest are probed over a process pool and written back to the cache.
+        Cache entries under `directory_path` for files that are no longer present are evicted.
+        """
+        with self._span("probe cache lookup"):
+            cached_entries = self._load_probe_cache(session, directory_path)
+
+            results = {}
+            items_to_probe = []
+            subtitle_update_rows = []
+            for video_item in video_items:
+                entry = cached_entries.get(video_item['path'])
+                if (not force_reprobe and entry is not None
+                        and entry.status != ProbeStatusEnum.TIMED_OUT
+                        and (entry.file_size, entry.mtime_ns, entry.inode) == video_item['identity']):
+                    results[video_item['path']] = {'duration': entry.duration_seconds, 'cached': True}
+                    if entry.subtitle_path != video_item['subtitle_path']:
+                        subtitle_update_rows.append({'row_id': entry.id, 'subtitle_path': video_item['subtitle_path']})
+                else:
+                    items_to_probe.append(video_item)
+        print(f"Probe cache: {len(results)} hit(s), {len(items_to_probe)} video(s) to probe.")
+        self._count("probe cache hits", len(results))
+
+        with self._span("probing"):
+            probed = self._run_probes([video_item['path'] for video_item in items_to_probe], progress_start, progress_end)
+        self._count("files probed", len(probed))
+        self._count("probe failures", sum(1 for _, status in probed if status == ProbeStatusEnum.FAILED))
+        self._count("probe timeouts", sum(1 for _, status in probed if status == ProbeStatusEnum.TIMED_OUT))
+        # Entries are written with executemany statements, like the course rows (see _bulk_update)
+        new_entry_rows = []
+        entry_update_rows = []
+        for video_item, (duration, status) in zip(items_to_probe, probed):
+            results[video_item['path']] = {'duration': duration, 'cached': False}
+            if video_item['identity'] is None:
+                continue  # File could not be stat'ed; nothing to key the cache entry on
+            file_size, mtime_ns, inode = video_item['identity']
+            entry_values = {
+                'file_size': file_size,
+                'mtime_ns': mtime_ns,
+                'inode': inode,
+                'duration_seconds': duration,
+                'subtitle_path': video_item['subtitle_path'],
+                'status': status,
+            }
+            entry = cached_entries.get(video_item['path'])
+            if entry is None:
+                new_entry_rows.append({'path': video_item['path'], **entry_values})
+            else:
+                entry_update_rows.append({'row_id': entry.id, **entry_values})
+        self._bulk_insert(session, ProbeCacheEntry, new_entry_rows)
+        self._bulk_update(session, ProbeCacheEntry, entry_update_rows)
+        self._bulk_update(session, ProbeCacheEntry, subtitle_update_rows)
+
+        stale_entries = [entry for path, entry in cached_entries.items() if path not in results]
+        for entry in stale_entries:
+            session.delete(entry)
+        if stale_entries:
+            print(f"Probe cache: evicted {len(stale_entries)} entry(ies) for files no longer in the course.")
+            self._count("rows deleted", len(stale_entries))
+
+        return [results[video_item['path']] for video_item in video_items]
+
+    def _run_probes(self, video_paths, progress_start=0.0, progress_end=1.0):
+        """
+        Probes the duration of every video path. Container headers are read in-process; files they
+        cannot parse fall back to MoviePy in a process pool. Every probe is bounded by probe_timeout.
+        Results are returned as (duration, status) tuples in the same order as `video_paths`.
+        """
+        total = len(video_paths)
+        results = [None] * total
+        finished = 0
+
+        def record(index, result):
+            nonlocal finished
+            results[index] = result
+            finished += 1
+            self._check_scan_cancelled()
+            progress = progress_start + (progress_end - progress_start) * finished / total
+            self._call_gui_callback("update_progress", progress, f"Probing video {finished} of {total}...")
+
+        fallback_indices = []
+        for index, duration in self._run_header_probes(video_paths):
+            if duration is _PROBE_TIMED_OUT:
+                print(f"Warning: Probing timed out after {self.probe_timeout}s for video: {video_paths[index]}")
+                record(index, (None, ProbeStatusEnum.TIMED_OUT))
+            elif duration is None:
+                print(f"Fast probe failed, falling back to MoviePy for: {video_paths[index]}")
+                fallback_indices.append(index)
+            else:
+                record(index, (duration, ProbeStatusEnum.OK))
+        if fallback_indices:
+            self._run_fallback_probes(video_paths, fallback_indices, record)
+        return results
+
+    def _run_header_probes(self, video_paths):
+        """
+        Yields (index, duration or None) for every video path, in order, reading container headers
+        (microseconds per file, so no process pool). The reads run on a helper thread: a file that
+        blocks (a FIFO, a stalled network share) yields _PROBE_TIMED_OUT after probe_timeout, and the
+        remaining files go to a fresh thread. Cancelling the scan is checked while waiting.
+        """
+        index = 0
+        prober = None
+        try:
+            while index < len(video_paths):
+                if prober is None:
+                    prober = _HeaderProbeThread(video_paths, index)
+                    prober.start()
+                try:
+                    result_index, duration = prober.results.get(timeout=PROBE_POLL_INTERVAL_SECONDS)
+                except queue.Empty:
+                    self._check_scan_cancelled()
+                    current = prober.current
+                    if current is None or current[0] != index or time.monotonic() - current[1] < self.probe_timeout:
+                        continue
+                    # The stuck read cannot be interrupted; its (daemon) thread is left behind
+                    prober.abandoned.set()
+                    prober = None
+                    index += 1
+                    yield index - 1, _PROBE_TIMED_OUT
+                    continue
+                index = result_index + 1
+                yield result_index, duration
+        finally:
+            if prober is not None:
+                prober.abandoned.set()  # Cancelled or failed: stop after the current file
+
+    def _run_fallback_probes(self, video_paths, indices, record):
+        """
+        Probes video_paths[index] for every index with MoviePy over a process pool, calling
+        record(index, (duration, status)) as results arrive. A probe running longer than probe_timeout
+        is marked timed out and the pool's processes are stopped, since it cannot be interrupted otherwise.
+        """
+        # Imported here: the process pool pulls in multiprocessing, which only the MoviePy fallback needs
+        import multiprocessing
+
+        # Forking the GUI process from a scan thread while Tk and other threads run is unsafe. A fork server
+        # forks workers from a clean process that imports this module once, so later pools start quickly;
+        # where there is none (Windows), workers are spawned.
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload([__name__])
+            _start_fork_server()
+        else:
+            context = multiprocessing.get_context("spawn")
+        pool_size = min(self.probe_workers or os.cpu_count() or 1, len(indices))
+        pending = collections.deque(indices)
+        completed = queue.Queue()  # (index, duration, error), put by the pool's result thread
+        running = {}  # index -> monotonic time a worker started it, or None until then
+        pool = started_queue = None
+        try:
+            while pending or running:
+                if pool is None:
+                    # Workers report each probe they start, so worker start-up does not count against the timeout
+                    started_queue = context.Queue()
+                    pool = context.Pool(pool_size, initializer=_init_probe_worker, initargs=(started_queue,))
+                # At most one probe per worker is in flight
+                while pending and len(running) < pool_size:
+                    index = pending.popleft()
+                    running[index] = None
+                    pool.apply_async(_probe_video_file, (index, video_paths[index]),
+                                     callback=lambda duration, index=index: completed.put((index, duration, None)),
+                                     error_callback=lambda error, index=index: completed.put((index, None, error)))
+
+                try:
+                    index, duration, error = completed.get(timeout=PROBE_POLL_INTERVAL_SECONDS)
+                except queue.Empty:
+                    self._check_scan_cancelled()
+                else:
+                    del running[index]
+                    if error is not None:
+                        print(f"Warning: Probe worker failed for video {video_paths[index]}: {error}")
+                    record(index, (duration, ProbeStatusEnum.OK if duration is not None else ProbeStatusEnum.FAILED))
+
+                now = time.monotonic()
+                while not started_queue.empty():
+                    index = started_queue.get()
+                    if index in running:
+                        running[index] = now
+                timed_out = [index for index, started in running.items()
+                             if started is not None and now - started >= self.probe_timeout]
+                if not timed_out:
+                    continue
+                for index in timed_out:
+                    del running[index]
+                    print(f"Warning: Probing timed out after {self.probe_timeout}s for video: {video_paths[index]}")
+                    record(index, (None, ProbeStatusEnum.TIMED_OUT))
+                # Stop the pool's processes and resubmit the probes that were still running to a fresh pool
+                pending.extendleft(reversed(list(running)))
+                running.clear()
+                pool.terminate()
+                pool.join()
+                pool = None
+                while True:  # Results the old pool delivered before it stopped are stale
+                    try:
+                        completed.get_nowait()
+                    except queue.Empty:
+                        break
+        finally:
+            if pool is not None:
+                # Also stops probes still running when the scan is cancelled or fails
+                pool.terminate()
+                pool.join()
+
+    @staticmethod
+    def _load_probe_cache(session, directory_path):
+        """Loads every probe cache entry below `directory_path` with a single query, keyed by path."""
+        prefix = os.path.join(directory_path, "")
+        return {entry.path: entry for entry in
+                session.query(ProbeCacheEntry).filter(ProbeCacheEntry.path.startswith(prefix, autoescape=True))}
+
+    @_traced("evict probe cache")
+    def evict_stale_probe_cache(self, directory_path=None):
+        """
+        Removes probe cache entries whose files no longer exist (only those below `directory_path` if given),
+        e.g. for files moved or deleted outside a scan. Returns the number of evicted entries.
+        """
+        try:
+            query = self.db_session.query(ProbeCacheEntry.id, ProbeCacheEntry.path)
+            if directory_path is not None:
+                query = query.filter(ProbeCacheEntry.path.startswith(os.path.join(directory_path, ""), autoescape=True))
+            with self._span("file checks"):
+                stale_ids = [entry_id for entry_id, path in query if not os.path.exists(path)]
+            # One DELETE per batch of ids, within SQLite's limit on bound parameters
+            with self._span("bulk delete"):
+                for start in range(0, len(stale_ids), DELETE_BATCH_SIZE):
+                    self.db_session.execute(
+                        delete(ProbeCacheEntry).where(ProbeCacheEntry.id.in_(stale_ids[start:start + DELETE_BATCH_SIZE])),
+                        execution_options={"synchronize_session": False})
+            self._count("rows deleted", len(stale_ids))
+            self._commit(self.db_session)
+            return len(stale_ids)
+        except Exception as e:
+            self.db_session.rollback()
+            self._note_error(e)
+            print(f"Error evicting stale probe cache entries: {e}")
+            traceback.print_exc()
+            return 0
 
+    def load_course_graph(self, course_id):
+        """
+        Loads a course with all of its chapters and videos in three queries, ordered by
+        order_in_course / order_in_chapter. Objects already in the session are overwritten
+        with the current database state, so no session-wide expire is needed.
+        """
+        self._schedule_input = None
+        with self._span("load course graph"):
+            return (self.db_session.query(Course)
+                    .options(selectinload(Course.chapters).selectinload(Chapter.videos))
+                    .populate_existing()
+                    .filter(Course.id == course_id)
+                    .first())
+
+    def load_or_import_course(self, directory_path, course_name=None):
+        """
+        Loads the course registered for `directory_path`, or imports the folder as a new course.
+        The folder is chosen by the caller (the GUI's folder dialog or the command line).
+        `course_name` defaults to the folder name.
+        """
         # Check if this directory path is already a registered course
         course = self.db_session.query(Course).filter(Course.path == directory_path).first()
 
         if course:
-            self.current_course = course
-            self._call_gui_callback("show_message", f"Course '{course.name}' loaded from database.", "info")
+            with self._operation("load course"):
+                self.current_course = self.load_course_graph(course.id)
+                self._call_gui_callback("show_message", f"Course '{course.name}' loaded from database.", "info")
         else:
-            # New course: get name (for now, from folder name, ideally from user input)
-            course_name_suggestion = os.path.basename(directory_path)
-            # In a real app, use simpledialog.askstring or a CTkInputDialog for the name
-            course_name = course_name_suggestion
+            # New course: named after its folder unless the caller chose a name
+            course_name = course_name or os.path.basename(os.path.normpath(directory_path))
 
             # Check if a course with this name (but different path) already exists
             existing_course_with_name = self.db_session.query(Course).filter(Course.name == course_name).first()
@@ -93,91 +626,101 @@ class VideoSchedulerAppLogic:
                                         f"Please choose a different name or load the existing course by its folder.", "error")
                 return
 
-            new_course = Course(name=course_name, path=directory_path)
-            self.db_session.add(new_course)
-            try:
-                self.db_session.flush()  # Get new_course.id before full commit
-                self._scan_and_save_course_content(new_course, directory_path, is_new_course=True)
-                self.db_session.commit()  # Commit all changes for the new course
-                self.current_course = new_course
-                self._call_gui_callback("show_message", f"New course '{new_course.name}' created and scanned.", "info")
-            except Exception as e:
-                self.db_session.rollback()  # Rollback on error
-                print(f"Error creating new course '{course_name}': {e}")
-                traceback.print_exc()
-                self._call_gui_callback("show_message", f"Error creating course: {e}", "error")
-                self.current_course = None  # Ensure no partially set course
-                return
+            self._start_scan_job(
+                "import course",
+                lambda session: self._import_new_course(session, course_name, directory_path),
+                lambda course_id, error: self._on_course_import_finished(course_name, course_id, error)
+            )
+            return
 
         self._call_gui_callback("display_course_info", self.current_course)
         self._call_gui_callback("update_course_list_display")  # Refresh the list of all courses in GUI
 
-    def _scan_and_save_course_content(self, course_obj, directory_path, is_new_course=False):
-        """
-        Scans the course directory for chapters and videos, then saves/updates them in the database.
-        Supports nested directory structure and videos at any level.
-        """
-        print(f"Scanning content for course '{course_obj.name}' at path: {directory_path}")
-        overall_course_duration = 0.0
-
-        # Show progress dialog
-        self._call_gui_callback("show_progress_dialog", "Scanning course...")
-        self._call_gui_callback("update_progress", 0, "Initializing scan...")
+    def _import_new_course(self, session, course_name, directory_path):
+        """Scan job: creates the course and all of its chapters/videos. Returns the new course id."""
+        # Added to the session only once the folder is scanned and probed (see _scan_and_save_course_content)
+        new_course = Course(name=course_name, path=directory_path)
+        self._scan_and_save_course_content(session, new_course, directory_path, is_new_course=True)
+        return new_course.id
+
+    def _on_course_import_finished(self, course_name, course_id, error):
+        """Main-thread completion handler for _import_new_course."""
+        if error is not None:
+            self.current_course = None  # Ensure no partially set course
+            if isinstance(error, ScanCancelledError):
+                self._call_gui_callback("show_message", f"Import of course '{course_name}' cancelled.", "warning")
+            else:
+                print(f"Error creating new course '{course_name}': {error}")
+                self._call_gui_callback("show_message", f"Error creating course: {error}", "error")
+            return
 
-        if not os.path.isdir(directory_path):
-            self._call_gui_callback("hide_progress_dialog")
-            raise FileNotFoundError(f"Course base path '{directory_path}' not found or is not a directory.")
+        self.current_course = self.load_course_graph(course_id)
+        self._call_gui_callback("show_message", f"New course '{course_name}' created and scanned.", "info")
+        self._call_gui_callback("display_course_info", self.current_course)
+        self._call_gui_callback("update_course_list_display")  # Refresh the list of all courses in GUI
 
-        # First, scan all directories and files to build the tree structure
-        self._call_gui_callback("update_progress", 0.05, "Building directory structure...")
-        
+    def _build_course_structure(self, directory_path):
+        """
+        Walks the course directory and returns its chapter tree.
+        Each chapter is a dict with its videos and subchapters; each video records its file identity.
+        """
         def scan_directory(dir_path, parent_chapter=None, level=0):
             """Recursively scan directory and build chapter/video structure"""
+            self._check_scan_cancelled()
             items = []
             videos = []  # List to store videos at current level
-            
+
             try:
-                # First, collect all items in the directory
-                dir_items = []
-                for item_name in sorted(os.listdir(dir_path)):
-                    item_path = os.path.join(dir_path, item_name)
-                    dir_items.append((item_name, item_path, os.path.isdir(item_path)))
-                
+                # One listing per directory: entry types come from the DirEntry cache,
+                # and subtitles are matched against the same listing instead of probing the disk
+                with os.scandir(dir_path) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+                file_names = {os.path.normcase(entry.name): entry.name
+                              for entry in entries if not entry.is_dir()}
+
                 # Process directories first
-                for item_name, item_path, is_dir in dir_items:
-                    if is_dir:
+                for entry in entries:
+                    if entry.is_dir():
                         # Create chapter for this directory
                         chapter = {
-                            'name': item_name,
-                            'path': item_path,
+                            'name': entry.name,
+                            'path': entry.path,
                             'parent': parent_chapter,
                             'level': level,
                             'videos': [],
                             'subchapters': []
                         }
                         # Recursively scan subdirectory
-                        sub_items, sub_videos = scan_directory(item_path, chapter, level + 1)
+                        sub_items, sub_videos = scan_directory(entry.path, chapter, level + 1)
                         chapter['subchapters'] = sub_items
                         chapter['videos'] = sub_videos
                         # Only add chapter if it has videos or subchapters with videos
                         if sub_videos or any(len(sub['videos']) > 0 or len(sub['subchapters']) > 0 for sub in sub_items):
                             items.append(chapter)
-                    elif os.path.splitext(item_name)[1].lower() in VIDEO_EXTENSIONS:
+                    else:
+                        base_name, extension = os.path.splitext(entry.name)
+                        if extension.lower() not in VIDEO_EXTENSIONS:
+                            continue
                         # Add video to current level videos
+                        with self._span("subtitle lookup"):
+                            subtitle_path = _match_subtitle(dir_path, base_name, file_names)
                         videos.append({
-                            'name': item_name,
-                            'path': item_path,
+                            'name': entry.name,
+                            'path': entry.path,
                             'parent': parent_chapter,
-                            'level': level
+                            'level': level,
+                            'identity': _entry_identity(entry),
+                            'subtitle_path': subtitle_path
                         })
             except PermissionError:
                 print(f"Permission denied to read directory: {dir_path}")
-            
+
             return items, videos
 
         # Build the tree structure
-        course_structure, root_videos = scan_directory(directory_path)
-        
+        with self._span("directory walk"):
+            course_structure, root_videos = scan_directory(directory_path)
+
         # Only create root chapter if there are videos at root level
         if root_videos:
             root_chapter = {
@@ -189,138 +732,370 @@ class VideoSchedulerAppLogic:
                 'subchapters': course_structure
             }
             course_structure = [root_chapter]
-        
-        # Count total items for progress calculation
-        def count_items(items):
-            count = 0
+        return course_structure
+
+    @staticmethod
+    def _flatten_course_structure(course_structure):
+        """
+        Returns the chapters of a course tree as a flat list in processing (depth-first) order,
+        with 'order_in_course' set on every chapter to its unique position in that list
+        and 'order_in_chapter' on every video.
+        """
+        flat_chapters = []
+
+        def visit(items):
             for item in items:
-                count += 1  # Count the chapter itself
-                count += len(item['videos'])  # Count videos in this chapter
-                if 'subchapters' in item:
-                    count += count_items(item['subchapters'])
-            return count
-
-        total_items = count_items(course_structure)
-        processed_items = 0
-
-        def process_items(items, parent_db_chapter=None, order_counter=1):
-            """Process items and save to database"""
-            nonlocal processed_items, overall_course_duration
-            total_duration = 0.0
-            current_order = order_counter
-            
+                item['order_in_course'] = len(flat_chapters) + 1
+                for video_order, video_item in enumerate(item['videos'], start=1):
+                    video_item['order_in_chapter'] = video_order
+                flat_chapters.append(item)
+                visit(item['subchapters'])
+
+        visit(course_structure)
+        return flat_chapters
+
+    @staticmethod
+    def _compute_chapter_totals(course_structure, durations):
+        """
+        Returns ({chapter_path: total_seconds}, course_total_seconds).
+        A chapter's total includes the videos of all of its subchapters.
+        """
+        chapter_totals = {}
+
+        def visit(items):
+            total = 0.0
             for item in items:
-                processed_items += 1
-                progress = processed_items / total_items
-                self._call_gui_callback("update_progress", progress, 
-                    f"Processing item {processed_items} of {total_items}...")
-
-                # Create or update chapter in database
-                db_chapter = None
-                if not is_new_course:
-                    db_chapter = self.db_session.query(Chapter).filter_by(
-                        course_id=course_obj.id,
-                        path=item['path']
-                    ).first()
-
-                if not db_chapter:
-                    db_chapter = Chapter(
-                        name=item['name'],
-                        path=item['path'],
-                        order_in_course=current_order,  # Use current_order instead of order_counter
-                        course_id=course_obj.id
-                    )
-                    self.db_session.add(db_chapter)
-                    self.db_session.flush()
-                else:
-                    db_chapter.name = item['name']
-                    db_chapter.order_in_course = current_order  # Use current_order instead of order_counter
-
-                # Process videos in this chapter
-                chapter_duration = 0.0
-                video_order = 1
-                for video_item in item['videos']:
-                    video_duration = self.get_video_duration(video_item['path'])
-                    if video_duration is None:
-                        print(f"Warning: Could not get duration for video: {video_item['path']}")
-                        video_duration = 0.0
-
-                    subtitle_path = self.find_subtitle(video_item['path'])
-
-                    db_video = None
-                    if not is_new_course:
-                        db_video = self.db_session.query(Video).filter_by(
-                            chapter_id=db_chapter.id,
-                            path=video_item['path']
-                        ).first()
-
-                    if not db_video:
-                        db_video = Video(
-                            name=video_item['name'],
-                            path=video_item['path'],
-                            duration_seconds=video_duration,
-                            order_in_chapter=video_order,
-                            chapter_id=db_chapter.id,
-                            subtitle_path=subtitle_path
-                        )
-                        self.db_session.add(db_video)
-                    else:
-                        db_video.name = video_item['name']
-                        db_video.path = video_item['path']
-                        db_video.duration_seconds = video_duration
-                        db_video.order_in_chapter = video_order
-                        db_video.subtitle_path = subtitle_path
+                chapter_duration = sum(durations[video_item['path']] for video_item in item['videos'])
+                chapter_totals[item['path']] = chapter_duration + visit(item['subchapters'])
+                total += chapter_totals[item['path']]
+            return total
+
+        return chapter_totals, visit(course_structure)
 
-                    chapter_duration += video_duration
-                    video_order += 1
+    def _scan_and_save_course_content(self, session, course_obj, directory_path, is_new_course=False, force_reprobe=False):
+        """
+        Scans the course directory for chapters and videos, then saves/updates them in the database.
+        Supports nested directory structure and videos at any level.
+        Existing courses are updated incrementally (see _rescan_course_content).
+        A new course is added to the session only after its videos are probed, together with its rows.
+        With `force_reprobe`, every video is probed again even if the probe cache is still valid.
+        """
+        if not is_new_course:
+            return self._rescan_course_content(session, course_obj, directory_path, force_reprobe=force_reprobe)
 
-                # Process subchapters
-                subchapter_duration = process_items(item['subchapters'], db_chapter, current_order + 1)
-                db_chapter.total_duration_seconds = chapter_duration + subchapter_duration
-                total_duration += db_chapter.total_duration_seconds
-                current_order += 1  # Increment order for next chapter
+        print(f"Scanning content for course '{course_obj.name}' at path: {directory_path}")
 
-            return total_duration
+        # Show progress dialog
+        self._call_gui_callback("show_progress_dialog", "Scanning course...")
+        self._call_gui_callback("update_progress", 0, "Initializing scan...")
 
-        # Process all items
-        overall_course_duration = process_items(course_structure)
+        if not os.path.isdir(directory_path):
+            self._call_gui_callback("hide_progress_dialog")
+            raise FileNotFoundError(f"Course base path '{directory_path}' not found or is not a directory.")
 
-        # Update course total duration
+        # First, scan all directories and files to build the tree structure
+        self._call_gui_callback("update_progress", 0.05, "Building directory structure...")
+        course_structure = self._build_course_structure(directory_path)
+
+        # Probe all videos up front (in parallel), in course order
+        flat_chapters = self._flatten_course_structure(course_structure)
+        all_videos = [video_item for chapter_item in flat_chapters for video_item in chapter_item['videos']]
+        probe_results = self._probe_videos(session, directory_path, all_videos, progress_start=0.05, progress_end=0.8,
+                                           force_reprobe=force_reprobe)
+
+        self._check_scan_cancelled()
+        self._call_gui_callback("update_progress", 0.85, f"Saving {len(flat_chapters)} chapters and {len(all_videos)} videos...")
+        durations = {}
+        for video_item, probe_result in zip(all_videos, probe_results):
+            video_duration = probe_result['duration']
+            if video_duration is None:
+                print(f"Warning: Could not get duration for video: {video_item['path']}")
+                video_duration = 0.0
+            durations[video_item['path']] = video_duration
+        chapter_totals, overall_course_duration = self._compute_chapter_totals(course_structure, durations)
+
+        # The course is written only now: walking and probing hold no write lock, so progress updates
+        # made meanwhile on other courses are not blocked, and the write transaction stays short
         course_obj.total_duration_seconds = overall_course_duration
+        session.add(course_obj)
+        self._flush(session)  # Get course_obj.id for its chapter rows
+        self._bulk_insert_course_rows(session, course_obj.id, flat_chapters, durations, chapter_totals)
+        with self._span("progress aggregates"):
+            refresh_progress_aggregates(session, [course_obj.id])
 
         # Final progress update
         self._call_gui_callback("update_progress", 1.0, "Scan completed!")
         # Hide progress dialog
         self._call_gui_callback("hide_progress_dialog")
 
-    def rescan_current_course(self):
-        """Rescans the currently loaded course for file changes."""
+    def _bulk_insert_course_rows(self, session, course_id, flat_chapters, durations, chapter_totals):
+        """
+        Inserts all chapters and videos of a new course with two executemany INSERTs.
+        Chapter ids are pre-assigned (the scan transaction already holds SQLite's write lock),
+        so videos can reference them without a flush per chapter.
+        """
+        next_chapter_id = (session.query(func.max(Chapter.id)).scalar() or 0) + 1
+        chapter_rows = []
+        video_rows = []
+        for chapter_id, chapter_item in enumerate(flat_chapters, start=next_chapter_id):
+            chapter_rows.append({
+                'id': chapter_id,
+                'name': chapter_item['name'],
+                'path': chapter_item['path'],
+                'order_in_course': chapter_item['order_in_course'],
+                'total_duration_seconds': chapter_totals[chapter_item['path']],
+                'course_id': course_id,
+            })
+            for video_item in chapter_item['videos']:
+                video_rows.append({
+                    'name': video_item['name'],
+                    'path': video_item['path'],
+                    'duration_seconds': durations[video_item['path']],
+                    'order_in_chapter': video_item['order_in_chapter'],
+                    'chapter_id': chapter_id,
+                    'subtitle_path': video_item['subtitle_path'],
+                })
+
+        self._bulk_insert(session, Chapter, chapter_rows)
+        self._bulk_insert(session, Video, video_rows)
+
+    def _rescan_course_content(self, session, course_obj, directory_path, force_reprobe=False):
+        """
+        Diffs a fresh snapshot of the course directory against the rows stored for the course
+        and applies only the inserts, updates and deletes that are needed.
+        Watch progress is kept for every video that still exists.
+        Returns a change summary dict (see _format_rescan_summary).
+        """
+        print(f"Rescanning content for course '{course_obj.name}' at path: {directory_path}")
+        self._call_gui_callback("show_progress_dialog", "Rescanning course...")
+        self._call_gui_callback("update_progress", 0, "Building directory snapshot...")
+
+        if not os.path.isdir(directory_path):
+            self._call_gui_callback("hide_progress_dialog")
+            raise FileNotFoundError(f"Course base path '{directory_path}' not found or is not a directory.")
+
+        course_structure = self._build_course_structure(directory_path)
+        snapshot_chapters = self._flatten_course_structure(course_structure)
+        snapshot_videos = [video_item for chapter_item in snapshot_chapters for video_item in chapter_item['videos']]
+
+        # Unchanged files are answered by the probe cache; only new or modified files are probed
+        probe_results = dict(zip((video_item['path'] for video_item in snapshot_videos),
+                                 self._probe_videos(session, directory_path, snapshot_videos,
+                                                    progress_start=0.05, progress_end=0.8,
+                                                    force_reprobe=force_reprobe)))
+
+        self._check_scan_cancelled()
+        self._call_gui_callback("update_progress", 0.85, "Comparing with database...")
+        diff_started = time.perf_counter()
+        summary = {
+            'chapters_added': 0,
+            'chapters_removed': 0,
+            'videos_added': 0,
+            'videos_removed': 0,
+            'videos_updated': 0,
+            'videos_reordered': 0,
+        }
+
+        db_chapters = {chapter.path: chapter for chapter in
+                       session.query(Chapter).filter(Chapter.course_id == course_obj.id)}
+        db_videos = {video.path: video for video in
+                     session.query(Video).join(Chapter).filter(Chapter.course_id == course_obj.id)}
+
+        durations = {}
+        for video_item in snapshot_videos:
+            video_duration = probe_results[video_item['path']]['duration']
+            if video_duration is None:
+                print(f"Warning: Could not get duration for video: {video_item['path']}")
+                video_duration = 0.0
+            durations[video_item['path']] = video_duration
+        chapter_totals, course_total = self._compute_chapter_totals(course_structure, durations)
+
+        # Changed rows are collected and written with one executemany UPDATE per table
+        # (ORM updates would cost a statement per row whenever consecutive rows change different columns)
+        chapter_update_rows = []
+        video_update_rows = []
+
+        # Chapters: insert new ones, update name/order/total of existing ones
+        new_chapters = []
+        for chapter_item in snapshot_chapters:
+            db_chapter = db_chapters.get(chapter_item['path'])
+            chapter_values = {
+                'name': chapter_item['name'],
+                'order_in_course': chapter_item['order_in_course'],
+                'total_duration_seconds': chapter_totals[chapter_item['path']],
+            }
+            if db_chapter is None:
+                db_chapter = Chapter(path=chapter_item['path'], course_id=course_obj.id, **chapter_values)
+                session.add(db_chapter)
+                new_chapters.append(db_chapter)
+                summary['chapters_added'] += 1
+            elif any(getattr(db_chapter, column) != value for column, value in chapter_values.items()):
+                chapter_update_rows.append({'row_id': db_chapter.id, **chapter_values})
+            chapter_item['db_chapter'] = db_chapter
+        if new_chapters:
+            self._flush(session)  # Assign ids to the new chapters
+
+        # Videos: insert new ones, refresh changed files, fix order of moved ones
+        new_video_rows = []
+        for chapter_item in snapshot_chapters:
+            db_chapter = chapter_item['db_chapter']
+            for video_item in chapter_item['videos']:
+                video_duration = durations[video_item['path']]
+                db_video = db_videos.get(video_item['path'])
+                if db_video is None:
+                    new_video_rows.append({
+                        'name': video_item['name'],
+                        'path': video_item['path'],
+                        'duration_seconds': video_duration,
+                        'order_in_chapter': video_item['order_in_chapter'],
+                        'chapter_id': db_chapter.id,
+                        'subtitle_path': video_item['subtitle_path'],
+                    })
+                    summary['videos_added'] += 1
+                    continue
+
+                reordered = (db_video.chapter_id, db_video.order_in_chapter) != (db_chapter.id,
+                                                                                 video_item['order_in_chapter'])
+                # A re-probed file counts as updated only if what is stored for it actually changed
+                updated = (db_video.duration_seconds != video_duration
+                           or db_video.subtitle_path != video_item['subtitle_path']
+                           or db_video.name != video_item['name'])
+                if not (reordered or updated):
+                    continue
+                summary['videos_reordered'] += reordered
+                summary['videos_updated'] += updated
+                watched_seconds, watched_status = self._progress_for_new_duration(
+                    video_duration, db_video.watched_seconds, db_video.watched_status)
+                video_update_rows.append({
+                    'row_id': db_video.id,
+                    'name': video_item['name'],
+                    'subtitle_path': video_item['subtitle_path'],
+                    'chapter_id': db_chapter.id,
+                    'order_in_chapter': video_item['order_in_chapter'],
+                    'duration_seconds': video_duration,
+                    'watched_seconds': watched_seconds,
+                    'watched_status': watched_status,
+                })
+        self._bulk_insert(session, Video, new_video_rows)
+        self._bulk_update(session, Chapter, chapter_update_rows)
+        self._bulk_update(session, Video, video_update_rows)
+
+        # Deletions: rows whose files or directories are gone
+        snapshot_chapter_paths = {chapter_item['path'] for chapter_item in snapshot_chapters}
+        removed_videos = [video for path, video in db_videos.items() if path not in durations]
+        removed_chapters = [chapter for path, chapter in db_chapters.items() if path not in snapshot_chapter_paths]
+        self._delete_course_rows(session, course_obj.id, removed_videos, removed_chapters)
+        summary['videos_removed'] = len(removed_videos)
+        summary['chapters_removed'] = len(removed_chapters)
+
+        if course_obj.total_duration_seconds != course_total:
+            course_obj.total_duration_seconds = course_total
+        # Includes the chapter flush and the bulk statements above, which also have their own phases
+        self._add_time("database diff", time.perf_counter() - diff_started)
+
+        # Progress aggregates: recomputed from the rows as they are now
+        self._flush(session)
+        with self._span("progress aggregates"):
+            refresh_progress_aggregates(session, [course_obj.id])
+
+        self._call_gui_callback("update_progress", 1.0, "Rescan completed!")
+        self._call_gui_callback("hide_progress_dialog")
+        return summary
+
+    @staticmethod
+    def _progress_for_new_duration(duration, watched_seconds, watched_status):
+        """Returns a video's (watched_seconds, watched_status), kept consistent with its new length."""
+        if watched_status == WatchedStatusEnum.WATCHED:
+            return duration, watched_status  # Stays fully watched at the new length
+        if (watched_seconds or 0) >= duration > 0:
+            return duration, WatchedStatusEnum.WATCHED
+        return watched_seconds, watched_status
+
+    def _delete_course_rows(self, session, course_id, videos, chapters):
+        """
+        Deletes videos and chapters (and schedule tasks pointing at those videos),
+        one executemany DELETE per table regardless of how many rows are removed.
+        The daily totals of the course's saved schedules are then recomputed from the remaining tasks.
+        """
+        video_params = [{'row_id': video.id} for video in videos]
+        chapter_params = [{'row_id': chapter.id} for chapter in chapters]
+        if not video_params and not chapter_params:
+            return
+        with self._span("bulk delete"):
+            if video_params:
+                session.execute(delete(ScheduleTask.__table__).where(ScheduleTask.video_id == bindparam('row_id')),
+                                video_params)
+                session.execute(delete(Video.__table__).where(Video.id == bindparam('row_id')), video_params)
+                days = DailySchedule.__table__
+                tasks = ScheduleTask.__table__
+                day_seconds = (select(func.coalesce(func.sum(tasks.c.duration_seconds), 0.0))
+                               .where(tasks.c.daily_schedule_id == days.c.id).scalar_subquery())
+                session.execute(update(days)
+                                .where(days.c.schedule_id.in_(select(Schedule.id).where(Schedule.course_id == course_id)))
+                                .values(total_time_minutes=day_seconds / 60))
+            if chapter_params:
+                session.execute(delete(Chapter.__table__).where(Chapter.id == bindparam('row_id')), chapter_params)
+        self._count("rows deleted", len(video_params) + len(chapter_params))
+
+        # The rows are gone; keep the session from flushing or reloading the stale objects
+        for obj in list(videos) + list(chapters):
+            session.expunge(obj)
+
+    @staticmethod
+    def _format_rescan_summary(summary):
+        """Formats a rescan change summary for the status bar."""
+        changes = [
+            (summary['videos_added'], "video(s) added"),
+            (summary['videos_removed'], "video(s) removed"),
+            (summary['videos_updated'], "video(s) updated"),
+            (summary['videos_reordered'], "video(s) reordered"),
+            (summary['chapters_added'], "chapter(s) added"),
+            (summary['chapters_removed'], "chapter(s) removed"),
+        ]
+        parts = [f"{count} {label}" for count, label in changes if count]
+        return ", ".join(parts) if parts else "no changes"
+
+    def rescan_current_course(self, force_reprobe=False):
+        """
+        Rescans the currently loaded course for file changes.
+        Unchanged videos are served from the probe cache unless `force_reprobe` is set.
+        """
         if not self.current_course:
             self._call_gui_callback("show_message", "No course selected to rescan.", "warning")
             return
 
         self._call_gui_callback("show_message", f"Rescanning course: {self.current_course.name}...", "info")
-        try:
-            # Refresh the course object from DB to get latest state before scan
-            self.db_session.refresh(self.current_course)
-            self._scan_and_save_course_content(self.current_course,
-                                               self.current_course.path,
-                                               is_new_course=False)
-            self.db_session.commit()  # Commit all changes from the rescan
-            self._call_gui_callback("show_message", "Course rescan completed successfully.", "info")
-        except Exception as e:
-            self.db_session.rollback()
-            print(f"Error during course rescan: {e}")
-            traceback.print_exc()
-            self._call_gui_callback("show_message", f"Error during rescan: {e}", "error")
+        course_id = self.current_course.id
+
+        def rescan_job(session):
+            course = session.get(Course, course_id)
+            return self._rescan_course_content(session, course, course.path, force_reprobe=force_reprobe)
+
+        self._start_scan_job("rescan course", rescan_job, self._on_rescan_finished)
+
+    def _on_rescan_finished(self, summary, error):
+        """Main-thread completion handler for rescan_current_course."""
+        if error is None:
+            self._call_gui_callback("show_message",
+                                    f"Course rescan completed: {self._format_rescan_summary(summary)}.", "info")
+        elif isinstance(error, ScanCancelledError):
+            self._call_gui_callback("show_message", "Course rescan cancelled; no changes were saved.", "warning")
+        else:
+            print(f"Error during course rescan: {error}")
+            self._call_gui_callback("show_message", f"Error during rescan: {error}", "error")
 
-        # Refresh current_course object and GUI display after potential changes
+        # The scan wrote through its own session; reload the course graph this session has cached
         if self.current_course:
-            self.db_session.refresh(self.current_course)
+            self.current_course = self.load_course_graph(self.current_course.id)
         self._call_gui_callback("display_course_info", self.current_course)
 
-    def generate_schedule(self, num_days_str, max_daily_minutes_str):
-        """Generate a schedule for the current course (does not save)."""
+    @_traced("generate schedule")
+    def generate_schedule(self, num_days_str, max_daily_minutes_str, mode=SCHEDULE_MODE_SPLIT):
+        """
+        Generate a schedule for the current course (does not save).
+        `mode` is one of scheduler.SCHEDULE_MODES: split videos to fill each day, or whole videos
+        only with balanced days, optionally keeping chapters together.
+        """
         if not self.current_course:
             self._call_gui_callback("show_message", "Please load a course first to generate a schedule.", "warning")
             return []
@@ -336,102 +1111,58 @@ class VideoSchedulerAppLogic:
             self._call_gui_callback("show_message", "Number of days and max daily minutes must be positive.", "error")
             return []
 
+        if mode not in SCHEDULE_MODES:
+            self._call_gui_callback("show_message", f"Unknown scheduling mode: '{mode}'.", "error")
+            return []
+
         # Only generate new schedule (do not save)
-        schedule_output_for_gui = self._generate_new_schedule(num_days, max_daily_minutes)
+        schedule_output_for_gui = self._generate_new_schedule(num_days, max_daily_minutes, mode)
         return schedule_output_for_gui
 
-    def _generate_new_schedule(self, num_days, max_daily_minutes):
+    def _generate_new_schedule(self, num_days, max_daily_minutes, mode=SCHEDULE_MODE_SPLIT):
         """Generates a new schedule for the current course."""
-        # Expire all data in session to ensure fresh data from DB for schedule generation
-        self.db_session.expire_all()
-        refreshed_course = self.db_session.query(Course).filter_by(id=self.current_course.id).first()
+        # Reload the course graph to ensure fresh data from DB for schedule generation
+        refreshed_course = self.load_course_graph(self.current_course.id)
         if not refreshed_course:
             self._call_gui_callback("show_message", "Error: Current course not found in database for scheduling.", "error")
             return []
         self.current_course = refreshed_course
 
-        # Get all unwatched videos
-        all_videos_flat = []
-        for chapter in self.current_course.chapters:
-            for video in chapter.videos:
-                if video.watched_status != WatchedStatusEnum.WATCHED:
-                    all_videos_flat.append({
-                        "id": video.id,
-                        "name": video.name,
-                        "total_duration_seconds": video.duration_seconds,
-                        "remaining_seconds": video.duration_seconds - video.watched_seconds,
-                        "chapter_name": chapter.name,
-                        "current_offset_seconds": video.watched_seconds
-                    })
-
-        if not all_videos_flat:
+        with self._span("schedule input"):
+            schedule_input = self._get_schedule_input()
+        if not len(schedule_input):
             self._call_gui_callback("show_message", "All videos in this course have been watched, or no videos to schedule.", "info")
             return []
-
-        total_remaining_course_duration_seconds = sum(v["remaining_seconds"] for v in all_videos_flat)
-        total_remaining_minutes = total_remaining_course_duration_seconds / 60
+        self._count("videos to schedule", len(schedule_input))
 
         # Check if completion is possible with given constraints
-        if total_remaining_minutes > (num_days * max_daily_minutes) and total_remaining_minutes > 0.1:
-            min_daily_needed = total_remaining_minutes / num_days if num_days > 0 else float('inf')
+        with self._span("feasibility check"):
+            required_minutes = minimum_daily_minutes(schedule_input, num_days, mode)
+            required_days = None
+            if required_minutes is not None and required_minutes > max_daily_minutes:
+                required_days = minimum_days(schedule_input, max_daily_minutes, mode)
+        if required_days is not None:
             message = (f"Warning: Completing the course in {num_days} days with {max_daily_minutes} minutes/day is not possible.\n"
-                       f"You need at least {min_daily_needed:.2f} minutes/day.")
+                       f"You need at least {required_minutes} minutes/day, or {required_days} days.")
             self._call_gui_callback("show_message", message, "warning")
 
-        schedule_output_for_gui = []
-        current_video_idx = 0
-
-        for day_num in range(1, num_days + 1):
-            daily_tasks = []
-            time_allocated_for_day_seconds = 0.0
-            max_daily_seconds = max_daily_minutes * 60
-
-            while time_allocated_for_day_seconds < max_daily_seconds and current_video_idx < len(all_videos_flat):
-                video_to_watch = all_videos_flat[current_video_idx]
-
-                if video_to_watch["remaining_seconds"] < 0.1:
-                    current_video_idx += 1
-                    continue
-
-                time_can_spend_on_this_video_today = max_daily_seconds - time_allocated_for_day_seconds
-                watch_duration_this_session = min(video_to_watch["remaining_seconds"], time_can_spend_on_this_video_today)
-
-                if watch_duration_this_session < 0.1:
-                    break
-
-                start_offset_s = video_to_watch["current_offset_seconds"]
-                end_offset_s = video_to_watch["current_offset_seconds"] + watch_duration_this_session
-
-                task = {
-                    "chapter_name": video_to_watch['chapter_name'],
-                    "video_name": video_to_watch['name'],
-                    "start_time": start_offset_s,
-                    "end_time": end_offset_s,
-                    "duration": watch_duration_this_session,
-                    "video_id": video_to_watch['id']
-                }
-                daily_tasks.append(task)
-
-                time_allocated_for_day_seconds += watch_duration_this_session
-                video_to_watch["remaining_seconds"] -= watch_duration_this_session
-                video_to_watch["current_offset_seconds"] += watch_duration_this_session
-
-                if video_to_watch["remaining_seconds"] < 0.1:
-                    current_video_idx += 1
-
-            if daily_tasks:
-                schedule_output_for_gui.append({
-                    "day": day_num,
-                    "tasks": daily_tasks,
-                    "total_time_minutes": time_allocated_for_day_seconds / 60
-                })
-
-            if current_video_idx >= len(all_videos_flat):
-                break
+        with self._span("scheduling"):
+            if mode == SCHEDULE_MODE_SPLIT:
+                schedule_output_for_gui, next_video_index, remaining_videos_with_time = schedule_split(
+                    schedule_input, num_days, max_daily_minutes)
+            else:
+                schedule_output_for_gui, next_video_index, remaining_videos_with_time = schedule_balanced(
+                    schedule_input, num_days, max_daily_minutes, keep_chapters=(mode == SCHEDULE_MODE_CHAPTERS))
+        self._count("schedule days", len(schedule_output_for_gui))
+        if mode != SCHEDULE_MODE_SPLIT:
+            over_budget_days = sum(1 for day_plan in schedule_output_for_gui
+                                   if day_plan["tasks"][0]["duration"] > max_daily_minutes * 60)
+            if over_budget_days:
+                self._call_gui_callback("show_message",
+                                        f"Warning: {over_budget_days} day(s) exceed {max_daily_minutes} minutes "
+                                        f"because a single video is longer than the daily budget.", "warning")
 
-        if current_video_idx < len(all_videos_flat) and schedule_output_for_gui:
-            remaining_videos_with_time = sum(1 for i in range(current_video_idx, len(all_videos_flat))
-                                             if all_videos_flat[i]["remaining_seconds"] > 0.1)
+        if next_video_index < len(schedule_input) and schedule_output_for_gui:
             if remaining_videos_with_time > 0:
                 self._call_gui_callback("show_message",
                                         f"Warning: With this plan, {remaining_videos_with_time} video(s) (or parts) will remain.",
@@ -441,53 +1172,114 @@ class VideoSchedulerAppLogic:
 
         return schedule_output_for_gui
 
+    def _get_schedule_input(self):
+        """Returns the unwatched videos of the current course, in course order, as a (cached) ScheduleInput."""
+        if self.current_course is None:
+            return None
+        if self._schedule_input is None or self._schedule_input_course_id != self.current_course.id:
+            video_ids, video_names, chapter_ids, chapter_names, durations, watched = [], [], [], [], [], []
+            for chapter in self.current_course.chapters:
+                for video in chapter.videos:
+                    if video.watched_status != WatchedStatusEnum.WATCHED:
+                        video_ids.append(video.id)
+                        video_names.append(video.name)
+                        chapter_ids.append(chapter.id)
+                        chapter_names.append(chapter.name)
+                        durations.append(video.duration_seconds)
+                        watched.append(video.watched_seconds)
+            self._schedule_input = ScheduleInput(video_ids, video_names, chapter_names, durations, watched, chapter_ids)
+            self._schedule_input_course_id = self.current_course.id
+        return self._schedule_input
+
+    def min_daily_minutes(self, num_days, mode=SCHEDULE_MODE_SPLIT):
+        """
+        Smallest daily budget in whole minutes that completes the current course in `num_days` days
+        with `mode`. Returns None without a course, for invalid input, or when nothing is left to watch.
+        """
+        schedule_input = self._get_schedule_input()
+        if schedule_input is None or num_days <= 0 or mode not in SCHEDULE_MODES:
+            return None
+        return minimum_daily_minutes(schedule_input, num_days, mode)
+
+    def min_days(self, max_daily_minutes, mode=SCHEDULE_MODE_SPLIT):
+        """
+        Smallest number of days that completes the current course with `max_daily_minutes` per day
+        and `mode`. Returns None without a course, for invalid input, or when nothing is left to watch.
+        """
+        schedule_input = self._get_schedule_input()
+        if schedule_input is None or max_daily_minutes <= 0 or mode not in SCHEDULE_MODES:
+            return None
+        return minimum_days(schedule_input, max_daily_minutes, mode)
+
+    @_traced("save schedule")
     def save_schedule(self, schedule_output, num_days, max_daily_minutes):
-        """Save the generated schedule to the database."""
+        """
+        Save the generated schedule to the database, replacing any previous schedule with the same parameters.
+        The delete and the bulk inserts run in one transaction, so a failed save keeps the old plan.
+        Returns a summary dict ('days', 'tasks', 'seconds') on success, None on failure.
+        """
+        started = time.perf_counter()
         try:
-            # Delete previous schedules with the same parameters for this course
-            self.db_session.query(Schedule).filter_by(
-                course_id=self.current_course.id,
-                num_days=num_days,
-                max_daily_minutes=max_daily_minutes
-            ).delete()
-            self.db_session.commit()
-            # Save new schedule
+            course_id = self.current_course.id
+            previous_schedule_ids = select(Schedule.id).where(
+                Schedule.course_id == course_id,
+                Schedule.num_days == num_days,
+                Schedule.max_daily_minutes == max_daily_minutes
+            )
+            previous_day_ids = select(DailySchedule.id).where(DailySchedule.schedule_id.in_(previous_schedule_ids))
+            # Set-based deletes, children first so foreign keys hold at every statement
+            with self._span("delete previous schedule"):
+                for statement in (delete(ScheduleTask).where(ScheduleTask.daily_schedule_id.in_(previous_day_ids)),
+                                  delete(DailySchedule).where(DailySchedule.schedule_id.in_(previous_schedule_ids)),
+                                  delete(Schedule).where(Schedule.id.in_(previous_schedule_ids))):
+                    result = self.db_session.execute(statement, execution_options={"synchronize_session": False})
+                    self._count("rows deleted", result.rowcount)
+
             new_schedule = Schedule(
-                course_id=self.current_course.id,
+                course_id=course_id,
                 num_days=num_days,
                 max_daily_minutes=max_daily_minutes
             )
             self.db_session.add(new_schedule)
-            self.db_session.flush()
-
-            for day_plan in schedule_output:
-                daily_schedule = DailySchedule(
-                    schedule_id=new_schedule.id,
-                    day_number=day_plan['day'],
-                    total_time_minutes=day_plan['total_time_minutes']
-                )
-                self.db_session.add(daily_schedule)
-                self.db_session.flush()
-
+            self._flush(self.db_session)
+
+            # Day ids are pre-assigned (the deletes above already hold SQLite's write lock),
+            # so tasks can reference them without a flush per day.
+            next_day_id = (self.db_session.query(func.max(DailySchedule.id)).scalar() or 0) + 1
+            day_rows = []
+            task_rows = []
+            for daily_schedule_id, day_plan in enumerate(schedule_output, start=next_day_id):
+                day_rows.append({
+                    'id': daily_schedule_id,
+                    'schedule_id': new_schedule.id,
+                    'day_number': day_plan['day'],
+                    'total_time_minutes': day_plan['total_time_minutes'],
+                })
                 for task in day_plan['tasks']:
-                    schedule_task = ScheduleTask(
-                        daily_schedule_id=daily_schedule.id,
-                        video_id=task['video_id'],
-                        chapter_name=task['chapter_name'],
-                        video_name=task['video_name'],
-                        start_time_seconds=task['start_time'],
-                        end_time_seconds=task['end_time'],
-                        duration_seconds=task['duration']
-                    )
-                    self.db_session.add(schedule_task)
-            self.db_session.commit()
-            return True
+                    task_rows.append({
+                        'daily_schedule_id': daily_schedule_id,
+                        'video_id': task['video_id'],
+                        'chapter_name': task['chapter_name'],
+                        'video_name': task['video_name'],
+                        'start_time_seconds': task['start_time'],
+                        'end_time_seconds': task['end_time'],
+                        'duration_seconds': task['duration'],
+                    })
+
+            self._bulk_insert(self.db_session, DailySchedule, day_rows)
+            self._bulk_insert(self.db_session, ScheduleTask, task_rows)
+            self._commit(self.db_session)
+            elapsed_seconds = time.perf_counter() - started
+            print(f"Saved schedule ({len(day_rows)} days, {len(task_rows)} tasks) in {elapsed_seconds * 1000:.1f} ms")
+            return {'days': len(day_rows), 'tasks': len(task_rows), 'seconds': elapsed_seconds}
         except Exception as e:
             self.db_session.rollback()
+            self._note_error(e)
             print(f"Error saving schedule to database: {e}")
             traceback.print_exc()
-            return False
+            return None
 
+    @_traced("update progress")
     def update_video_progress(self, video_id_str, new_watched_status_str, watched_seconds_str="0"):
         """Updates the watched status and progress of a video."""
         try:
@@ -498,6 +1290,8 @@ class VideoSchedulerAppLogic:
                 return
 
             new_status = WatchedStatusEnum(new_watched_status_str)  # Convert string to Enum member
+            previous_watched_seconds = video.watched_seconds or 0.0
+            previous_status = video.watched_status
 
             if new_status == WatchedStatusEnum.WATCHED:
                 video.watched_seconds = video.duration_seconds
@@ -522,25 +1316,78 @@ class VideoSchedulerAppLogic:
                     return  # Do not proceed if value is invalid
 
             video.watched_status = new_status
-            self.db_session.commit()
+            self._apply_progress_change(video, previous_watched_seconds, previous_status)
+            # Only this video and its chapter and course rows change, so the commit keeps the rest of the
+            # loaded course graph instead of expiring it (reloading it would cost a full graph load per click)
+            self.db_session.expire_on_commit = False
+            try:
+                self._commit(self.db_session)
+            finally:
+                self.db_session.expire_on_commit = True
+            # Reads back the progress columns (the aggregates were updated in SQL); a full refresh
+            # would also reload the relationships, i.e. the whole course graph
+            chapter = video.chapter
+            self.db_session.refresh(video, ['watched_seconds', 'watched_status'])
+            for row in (chapter, chapter.course):
+                self.db_session.refresh(row, PROGRESS_AGGREGATE_COLUMNS)
+            self._schedule_input = None  # Watched videos drop out of the next schedule
             self._call_gui_callback("show_message", f"Video '{video.name}' status updated.", "info")
-            # Refresh GUI to show updated status
-            self._call_gui_callback("display_course_info", self.current_course)
+            self._call_gui_callback("update_video_row", video)
+            self._call_gui_callback("update_course_row", chapter.course)  # Refreshes the course's progress in the list
 
         except ValueError as ve:  # Handles errors from int() or WatchedStatusEnum() conversion
             self._call_gui_callback("show_message", f"Error in input value: {ve}", "error")
         except Exception as e:
             self.db_session.rollback()
+            self._note_error(e)
             self._call_gui_callback("show_message", f"Error updating video status: {e}", "error")
             traceback.print_exc()
 
-    def get_all_courses(self):
-        """Retrieves all courses from the database, ordered by name."""
-        return self.db_session.query(Course).order_by(Course.name).all()
+    @staticmethod
+    def _apply_progress_change(video, previous_watched_seconds, previous_status):
+        """
+        Applies one video's progress change to the aggregates of its chapter and course.
+        The deltas are written as `column = column + delta`, so this costs one small UPDATE per row
+        however large the course is (rescans recompute them instead, see refresh_progress_aggregates).
+        """
+        seconds_delta = (video.watched_seconds or 0.0) - previous_watched_seconds
+        watched_delta = (int(video.watched_status == WatchedStatusEnum.WATCHED)
+                         - int(previous_status == WatchedStatusEnum.WATCHED))
+        partial_delta = (int(video.watched_status == WatchedStatusEnum.PARTIALLY_WATCHED)
+                         - int(previous_status == WatchedStatusEnum.PARTIALLY_WATCHED))
+        if not (seconds_delta or watched_delta or partial_delta):
+            return
+        chapter = video.chapter
+        for model, row in ((Chapter, chapter), (Course, chapter.course)):
+            row.watched_seconds = model.watched_seconds + seconds_delta
+            row.watched_video_count = model.watched_video_count + watched_delta
+            row.partially_watched_video_count = model.partially_watched_video_count + partial_delta
+
+    def get_course_index(self):
+        """
+        Returns a lightweight list of {'id', 'name', 'search_key', 'progress', 'total_duration_seconds',
+        'video_count', 'watched_video_count'} dicts for all courses, ordered by name.
+        Only a few columns are read, and the lowercase search key is computed once here instead of per keystroke.
+        'progress' is the watched percentage, read from the stored course aggregates.
+        """
+        rows = self.db_session.query(Course.id, Course.name, Course.watched_seconds, Course.total_duration_seconds,
+                                     Course.video_count, Course.watched_video_count).order_by(Course.name).all()
+        return [{'id': course_id, 'name': name, 'search_key': name.lower(),
+                 'progress': self.progress_percent(watched_seconds, total_seconds),
+                 'total_duration_seconds': total_seconds or 0.0,
+                 'video_count': video_count or 0,
+                 'watched_video_count': watched_video_count or 0}
+                for course_id, name, watched_seconds, total_seconds, video_count, watched_video_count in rows]
+
+    @staticmethod
+    def progress_percent(watched_seconds, total_seconds):
+        """Watched share of a course (or chapter) in percent, from its stored aggregates."""
+        return (watched_seconds or 0) / total_seconds * 100 if total_seconds else 0.0
 
+    @_traced("load course")
     def load_course_by_id(self, course_id):
         """Loads a specific course by its ID and updates the GUI."""
-        course = self.db_session.query(Course).filter(Course.id == course_id).first()
+        course = self.load_course_graph(course_id)
         if course:
             self.current_course = course
             self._call_gui_callback("display_course_info", self.current_course)
@@ -550,16 +1397,49 @@ class VideoSchedulerAppLogic:
             self._call_gui_callback("display_course_info", None)
             self._call_gui_callback("show_message", f"Error: Course with ID {course_id} not found.", "error")
 
+    @_traced("delete course")
     def delete_course(self, course_id):
-        """Deletes a course (and its chapters/videos via cascade) from the database."""
+        """
+        Deletes a course with its chapters, videos and schedules from the database.
+        The rows are removed with one set-based DELETE per table, children first; an ORM cascade
+        would load the schedule tasks of every video one query at a time.
+        The probe cache entries of the course's files are removed too.
+        """
         course_to_delete = self.db_session.query(Course).filter(Course.id == course_id).first()
         if course_to_delete:
             course_name = course_to_delete.name
-            self.db_session.delete(course_to_delete)
-            self.db_session.commit()
+            course_files_prefix = os.path.join(course_to_delete.path, "")
+            deleting_current_course = self.current_course is not None and self.current_course.id == course_id
+            chapter_ids = select(Chapter.id).where(Chapter.course_id == course_id)
+            video_ids = select(Video.id).where(Video.chapter_id.in_(chapter_ids))
+            schedule_ids = select(Schedule.id).where(Schedule.course_id == course_id)
+            day_ids = select(DailySchedule.id).where(DailySchedule.schedule_id.in_(schedule_ids))
+            try:
+                with self._span("bulk delete"):
+                    for statement in (
+                        delete(ScheduleTask).where(or_(ScheduleTask.daily_schedule_id.in_(day_ids),
+                                                       ScheduleTask.video_id.in_(video_ids))),
+                        delete(DailySchedule).where(DailySchedule.schedule_id.in_(schedule_ids)),
+                        delete(Schedule).where(Schedule.course_id == course_id),
+                        delete(Video).where(Video.chapter_id.in_(chapter_ids)),
+                        delete(Chapter).where(Chapter.course_id == course_id),
+                        delete(Course).where(Course.id == course_id),
+                        delete(ProbeCacheEntry).where(ProbeCacheEntry.path.startswith(course_files_prefix,
+                                                                                      autoescape=True)),
+                    ):
+                        result = self.db_session.execute(statement, execution_options={"synchronize_session": False})
+                        self._count("rows deleted", result.rowcount)
+                self._commit(self.db_session)
+            except Exception as e:
+                self.db_session.rollback()
+                self._note_error(e)
+                print(f"Error deleting course '{course_name}': {e}")
+                traceback.print_exc()
+                self._call_gui_callback("show_message", f"Error deleting course: {e}", "error")
+                return
 
             # If the deleted course was the current one, clear current_course
-            if self.current_course and self.current_course.id == course_id:
+            if deleting_current_course:
                 self.current_course = None
                 self._call_gui_callback("display_course_info", None)  # Clear details view
 
@@ -575,3 +1455,88 @@ class VideoSchedulerAppLogic:
         if self.db_session:
             self.db_session.close()
             print("Database session closed.")
+
+
+def _start_fork_server():
+    """
+    Starts multiprocessing's fork server (if not running) so that its preload finds this module.
+    The server runs as `python -c` with only the working directory on its path (the sys_path it is
+    given is not applied), so without this directory on PYTHONPATH every worker re-imports this module.
+    """
+    from multiprocessing import forkserver
+
+    python_path = os.environ.get("PYTHONPATH")
+    module_directory = os.path.dirname(os.path.abspath(__file__))
+    os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [module_directory, python_path]))
+    try:
+        forkserver.ensure_running()
+    finally:
+        if python_path is None:
+            del os.environ["PYTHONPATH"]
+        else:
+            os.environ["PYTHONPATH"] = python_path
+
+
+_probe_started_queue = None  # Set in each probe worker process by _init_probe_worker
+
+
+def _init_probe_worker(started_queue):
+    global _probe_started_queue
+    _probe_started_queue = started_queue
+
+
+def _probe_video_file(index, video_path):
+    """Process-pool worker: reports that probe `index` started, then returns the MoviePy duration of one video file (or None)."""
+    _probe_started_queue.put(index)
+    return VideoSchedulerAppLogic.moviepy_duration(video_path)
+
+
+class _HeaderProbeThread(threading.Thread):
+    """Reads the container headers of video_paths[start_index:] in order (see _run_header_probes)."""
+
+    def __init__(self, video_paths, start_index):
+        super().__init__(name="header-probe", daemon=True)
+        self.video_paths = video_paths
+        self.start_index = start_index
+        self.results = queue.Queue()  # (index, duration or None)
+        self.current = None  # (index, monotonic start) of the file being read
+        self.abandoned = threading.Event()
+
+    def run(self):
+        for index in range(self.start_index, len(self.video_paths)):
+            if self.abandoned.is_set():
+                return
+            self.current = (index, time.monotonic())
+            try:
+                duration = probe_duration(self.video_paths[index])
+            except Exception as e:  # A parser bug must not look like a stuck file
+                print(f"Warning: Fast probe error for video {self.video_paths[index]}: {e}")
+                duration = None
+            self.results.put((index, duration))
+
+
+def _entry_identity(entry):
+    """
+    Returns (size, mtime_ns, inode) for a scandir DirEntry, or None if it cannot be stat'ed.
+    On Windows the stat result is served from the directory listing (with inode 0).
+    """
+    try:
+        st = entry.stat()
+    except OSError:
+        return None
+    inode = st.st_ino
+    if inode >= 1 << 63:  # Some filesystems use unsigned 64-bit IDs; keep them within SQLite's INTEGER range
+        inode -= 1 << 64
+    return st.st_size, st.st_mtime_ns, inode
+
+
+def _match_subtitle(dir_path, video_base_name, file_names):
+    """
+    Finds a subtitle for a video in an already-listed directory.
+    `file_names` maps os.path.normcase(name) to the real name for every file in `dir_path`.
+    """
+    for sub_ext in SUBTITLE_EXTENSIONS:
+        subtitle_name = file_names.get(os.path.normcase(video_base_name + sub_ext))
+        if subtitle_name is not None:
+            return os.path.join(dir_path, subtitle_name)
+    return None
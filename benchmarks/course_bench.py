@@ -0,0 +1,245 @@
+# benchmarks/course_bench.py
+#
+# End-to-end benchmark of the real VideoSchedulerAppLogic paths on synthetic courses (see synthetic_course.py),
+# run headlessly with stub GUI callbacks against a throwaway database. For each course size it times:
+# first import, course load, no-change rescan, partial-change rescan, generate_schedule (every mode),
+# save_schedule, course tree population (when a display is available) and course deletion.
+# The SQL statements of each operation are counted too, and operations over their query budget
+# (QUERY_BUDGETS, independent of course size, enforced with database.query_budget) fail the run and list
+# the statements they ran, so N+1 query regressions are caught.
+# Results are printed and written as JSON so runs can be compared between versions.
+#
+# Usage: python benchmarks/course_bench.py [--sizes 500,2000,5000] [--repeat 1] [--output results.json]
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import database  # noqa: E402
+from app_logic import VideoSchedulerAppLogic  # noqa: E402
+from scheduler import SCHEDULE_MODES, SCHEDULE_MODE_SPLIT  # noqa: E402
+from synthetic_course import change_course, generate_course  # noqa: E402
+
+# Schedule parameters: one hour a day, over as many days as the course needs
+SCHEDULE_DAILY_MINUTES = 60
+
+# Maximum SQL statements per operation, whatever the course size (an executemany counts once)
+QUERY_BUDGETS = {
+    'first_import': 15,
+    'course_load': 5,
+    'rescan_no_change': 10,
+    'rescan_partial_change': 20,
+    'generate_schedule_split': 5,
+    'generate_schedule_no_split': 5,
+    'generate_schedule_chapters': 5,
+    'save_schedule': 10,
+    'delete_course': 12,
+}
+
+
+class StubGui:
+    """Stand-in for the GUI callbacks: records messages and fails the run on errors."""
+
+    def __init__(self):
+        self.messages = []
+
+    def callbacks(self):
+        return {'show_message': self.show_message}
+
+    def show_message(self, message_text, message_type="info"):
+        self.messages.append((message_type, message_text))
+        if message_type == "error":
+            raise RuntimeError(f"The app reported an error: {message_text}")
+
+
+def timed(function, *args, **kwargs):
+    """Returns (elapsed_ms, result)."""
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return (time.perf_counter() - started) * 1000, result
+
+
+def measure(timings, statements, over_budget, name, function, *args, **kwargs):
+    """
+    Times one operation and counts its SQL statements under `name`, enforcing its QUERY_BUDGETS entry
+    with database.query_budget (overruns, with the statements run, are appended to `over_budget`).
+    Returns the operation's result.
+    """
+    budget = QUERY_BUDGETS.get(name)
+    counter = database.query_budget(budget, label=name) if budget is not None else database.count_queries()
+    try:
+        with counter as query_stats:
+            timings[f'{name}_ms'], result = timed(function, *args, **kwargs)
+    except database.QueryBudgetExceeded as e:
+        over_budget.append(str(e))
+    statements[name] = query_stats.statements
+    return result
+
+
+def new_logic(probe_workers):
+    logic = VideoSchedulerAppLogic(probe_workers=probe_workers)
+    logic.register_gui_callbacks(**StubGui().callbacks())
+    return logic
+
+
+def measure_tree_population(course):
+    """Times the course tree display and a full expansion in a hidden window. Returns None without a display."""
+    try:
+        from gui import VideoSchedulerGUI
+        window = VideoSchedulerGUI(new_logic(probe_workers=1))
+    except Exception as e:  # tkinter.TclError when there is no display
+        print(f"  tree population skipped: {e}", file=sys.stderr)
+        return None
+    try:
+        window.withdraw()
+        display_ms, _ = timed(window.display_course_info_in_treeview, course)
+        started = time.perf_counter()
+        for chapter_id in list(window.tree.get_children()):
+            window._fill_chapter_node(chapter_id)  # What Expand All does, without the after() slicing
+        window.update_idletasks()
+        return {'tree_display_ms': display_ms, 'tree_fill_all_ms': (time.perf_counter() - started) * 1000}
+    finally:
+        window.destroy()
+
+
+def check_durations(course, manifest):
+    """Fails the run unless the course holds exactly the manifest's videos with their generated durations."""
+    stored = {video.path: video.duration_seconds for chapter in course.chapters for video in chapter.videos}
+    wrong = [path for path, duration in manifest.items() if abs(stored.get(path, -1) - duration) > 0.001]
+    if len(stored) != len(manifest) or wrong:
+        raise RuntimeError(f"Course has {len(stored)} videos, expected {len(manifest)}; "
+                           f"{len(wrong)} durations differ from the generated files")
+
+
+def run_size(video_count, work_dir, probe_workers, with_tree, over_budget):
+    """Runs every benchmarked operation once on a fresh course of `video_count` videos."""
+    course_dir = os.path.join(work_dir, f"course_{video_count}")
+    manifest = generate_course(course_dir, video_count)
+    database.configure_database(path=os.path.join(work_dir, f"bench_{video_count}.db"))
+    VideoSchedulerAppLogic.initialize_database()
+    timings = {}
+    statements = {}
+    size_over_budget = []
+
+    logic = new_logic(probe_workers)
+    measure(timings, statements, size_over_budget, 'first_import', logic.load_or_import_course, course_dir)
+    course_id = logic.current_course.id
+    check_durations(logic.current_course, manifest)
+    chapter_count = len(logic.current_course.chapters)
+    logic.close_db_session()
+
+    logic = new_logic(probe_workers)  # Fresh session: nothing cached in the identity map
+    measure(timings, statements, size_over_budget, 'course_load', logic.load_course_by_id, course_id)
+    measure(timings, statements, size_over_budget, 'rescan_no_change', logic.rescan_current_course)
+
+    changes = change_course(manifest)
+    measure(timings, statements, size_over_budget, 'rescan_partial_change', logic.rescan_current_course)
+    check_durations(logic.current_course, manifest)
+
+    total_minutes = sum(manifest.values()) / 60
+    num_days = max(1, int(total_minutes // SCHEDULE_DAILY_MINUTES) + 1)
+    split_schedule = None
+    for mode in SCHEDULE_MODES:
+        schedule = measure(timings, statements, size_over_budget, f'generate_schedule_{mode}',
+                           logic.generate_schedule, str(num_days), str(SCHEDULE_DAILY_MINUTES), mode)
+        if mode == SCHEDULE_MODE_SPLIT:
+            split_schedule = schedule
+    measure(timings, statements, size_over_budget, 'save_schedule', logic.save_schedule, split_schedule, num_days, SCHEDULE_DAILY_MINUTES)
+
+    if with_tree:
+        tree_timings = measure_tree_population(logic.current_course)
+        if tree_timings:
+            timings.update(tree_timings)
+    measure(timings, statements, size_over_budget, 'delete_course', logic.delete_course, course_id)
+    logic.close_db_session()
+    shutil.rmtree(course_dir)
+    over_budget.extend(f"{video_count} videos: {message}" for message in size_over_budget)
+
+    return {
+        'videos': video_count,
+        'chapters': chapter_count,
+        'schedule_days': num_days,
+        'schedule_tasks': sum(len(day_plan['tasks']) for day_plan in split_schedule),
+        'partial_change': changes,
+        'timings_ms': timings,
+        'sql_statements': statements,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the app logic on synthetic courses.")
+    parser.add_argument("--sizes", default="500,2000,5000", help="Comma-separated course sizes (videos)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per size (the median of each timing is kept)")
+    parser.add_argument("--probe-workers", type=int, default=None, help="Probe processes (default: one per CPU)")
+    parser.add_argument("--no-tree", action="store_true", help="Skip the course tree population timings")
+    parser.add_argument("--output", default="course_bench_results.json", help="JSON results file")
+    args = parser.parse_args()
+
+    results = []
+    over_budget = []
+    # The app logs every scan step with print; keep the benchmark output readable
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size in (int(value) for value in args.sizes.split(",")):
+            runs = []
+            for run_number in range(args.repeat):
+                print(f"{size} videos, run {run_number + 1}/{args.repeat}...", file=sys.stderr)
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    runs.append(run_size(size, os.path.join(work_dir, f"run{run_number}"), args.probe_workers,
+                                         with_tree=not args.no_tree,
+                                         over_budget=over_budget))
+            result = runs[-1]
+            result['timings_ms'] = {name: statistics.median(run['timings_ms'][name] for run in runs)
+                                    for name in result['timings_ms']}
+            results.append(result)
+
+    for result in results:
+        print(f"\n{result['videos']} videos, {result['chapters']} chapters, "
+              f"{result['schedule_days']}-day schedule ({result['schedule_tasks']} tasks)")
+        print(f"  {'operation':<28} {'ms':>10} {'SQL':>6}")
+        for name, value in result['timings_ms'].items():
+            operation = name[:-len('_ms')]
+            print(f"  {operation:<28} {value:>10.1f} {result['sql_statements'].get(operation, ''):>6}")
+
+    report = {
+        'benchmark': 'course_bench',
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if over_budget:
+        print("\nQuery budget exceeded:")
+        for message in over_budget:
+            print(f"  - {message}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
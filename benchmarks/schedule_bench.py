@@ -0,0 +1,156 @@
+# benchmarks/schedule_bench.py
+#
+# Compares the array-based scheduler against the original per-video loop on synthetic catalogs,
+# checking that both produce identical schedules.
+#
+# Usage: python benchmarks/schedule_bench.py [--sizes 1000,10000,50000] [--repeat 3]
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import ScheduleInput, schedule_split  # noqa: E402
+
+
+def legacy_schedule(all_videos_flat, num_days, max_daily_minutes):
+    """The original scheduling loop from VideoSchedulerAppLogic._generate_new_schedule."""
+    schedule_output_for_gui = []
+    current_video_idx = 0
+
+    for day_num in range(1, num_days + 1):
+        daily_tasks = []
+        time_allocated_for_day_seconds = 0.0
+        max_daily_seconds = max_daily_minutes * 60
+
+        while time_allocated_for_day_seconds < max_daily_seconds and current_video_idx < len(all_videos_flat):
+            video_to_watch = all_videos_flat[current_video_idx]
+
+            if video_to_watch["remaining_seconds"] < 0.1:
+                current_video_idx += 1
+                continue
+
+            time_can_spend_on_this_video_today = max_daily_seconds - time_allocated_for_day_seconds
+            watch_duration_this_session = min(video_to_watch["remaining_seconds"], time_can_spend_on_this_video_today)
+
+            if watch_duration_this_session < 0.1:
+                break
+
+            start_offset_s = video_to_watch["current_offset_seconds"]
+            end_offset_s = video_to_watch["current_offset_seconds"] + watch_duration_this_session
+
+            task = {
+                "chapter_name": video_to_watch['chapter_name'],
+                "video_name": video_to_watch['name'],
+                "start_time": start_offset_s,
+                "end_time": end_offset_s,
+                "duration": watch_duration_this_session,
+                "video_id": video_to_watch['id']
+            }
+            daily_tasks.append(task)
+
+            time_allocated_for_day_seconds += watch_duration_this_session
+            video_to_watch["remaining_seconds"] -= watch_duration_this_session
+            video_to_watch["current_offset_seconds"] += watch_duration_this_session
+
+            if video_to_watch["remaining_seconds"] < 0.1:
+                current_video_idx += 1
+
+        if daily_tasks:
+            schedule_output_for_gui.append({
+                "day": day_num,
+                "tasks": daily_tasks,
+                "total_time_minutes": time_allocated_for_day_seconds / 60
+            })
+
+        if current_video_idx >= len(all_videos_flat):
+            break
+
+    remaining = 0
+    if current_video_idx < len(all_videos_flat):
+        remaining = sum(1 for i in range(current_video_idx, len(all_videos_flat))
+                        if all_videos_flat[i]["remaining_seconds"] > 0.1)
+    return schedule_output_for_gui, current_video_idx, remaining
+
+
+def make_catalog(video_count, seed):
+    """Returns (ids, names, chapter_names, durations, watched) for a synthetic catalog."""
+    rng = random.Random(seed)
+    ids, names, chapters, durations, watched = [], [], [], [], []
+    for i in range(video_count):
+        kind = rng.random()
+        if kind < 0.05:
+            duration = float(rng.randint(1, 20) * 30)  # Whole minutes and halves hit exact day boundaries
+        elif kind < 0.08:
+            duration = rng.uniform(0.0, 0.3)  # Near the 0.1s threshold
+        else:
+            duration = rng.uniform(20, 3600)
+        progress = rng.random()
+        watched_seconds = duration * rng.random() if progress < 0.1 else 0.0
+        ids.append(i + 1)
+        names.append(f"video_{i:06d}.mp4")
+        chapters.append(f"Chapter {i // 25:04d}")
+        durations.append(duration)
+        watched.append(watched_seconds)
+    return ids, names, chapters, durations, watched
+
+
+def run_legacy(catalog, num_days, max_daily_minutes):
+    ids, names, chapters, durations, watched = catalog
+    all_videos_flat = [
+        {"id": i, "name": n, "total_duration_seconds": d, "remaining_seconds": d - w,
+         "chapter_name": c, "current_offset_seconds": w}
+        for i, n, c, d, w in zip(ids, names, chapters, durations, watched)
+    ]
+    return legacy_schedule(all_videos_flat, num_days, max_daily_minutes)
+
+
+def run_vectorized(catalog, num_days, max_daily_minutes):
+    return schedule_split(ScheduleInput(*catalog), num_days, max_daily_minutes)
+
+
+def best_time(function, repeat):
+    """Best wall time of `repeat` runs, with garbage collection paused as timeit does."""
+    best, result = None, None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - started
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scheduling engine against the original loop.")
+    parser.add_argument("--sizes", default="1000,10000,50000", help="Comma-separated catalog sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    print(f"{'videos':>8} {'days':>6} {'min/day':>8} {'legacy ms':>10} {'array ms':>10} {'speedup':>8}  match")
+    for size in (int(value) for value in args.sizes.split(",")):
+        catalog = make_catalog(size, seed=size)
+        total_minutes = sum(d - w for d, w in zip(catalog[3], catalog[4])) / 60
+        # A short horizon that leaves videos over, and long ones with small and large daily budgets
+        for num_days, max_daily_minutes in ((30, 120), (max(1, int(total_minutes // 45)), 45),
+                                            (max(1, int(total_minutes // 600)), 600)):
+            legacy_seconds, legacy_result = best_time(lambda: run_legacy(catalog, num_days, max_daily_minutes), args.repeat)
+            array_seconds, array_result = best_time(lambda: run_vectorized(catalog, num_days, max_daily_minutes), args.repeat)
+            match = legacy_result == array_result
+            print(f"{size:>8} {num_days:>6} {max_daily_minutes:>8} {legacy_seconds * 1000:>10.1f} "
+                  f"{array_seconds * 1000:>10.1f} {legacy_seconds / array_seconds:>7.1f}x  {match}")
+            if not match:
+                sys.exit("Schedules differ from the original loop")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/startup_bench.py
+#
+# Measures cold start of the GUI in fresh interpreters and checks it against startup_budget.json:
+#   - an -X importtime breakdown of `import main` (slowest modules by cumulative time),
+#   - modules that must not be imported at startup (e.g. MoviePy, multiprocessing),
+#   - time to first window (the deferred startup work starts) and time until the course list is ready.
+# The window timings need a display; without one they are skipped.
+#
+# Usage: python benchmarks/startup_bench.py [--repeat 5] [--top 15] [--budget benchmarks/startup_budget.json]
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_budget.json")
+
+# Runs in the child interpreter: builds the GUI as main.py does and reports when the deferred
+# startup work begins (the window has been drawn) and ends (the course list is filled).
+WINDOW_PROBE = """
+import json, sys, time
+marks = {}
+from app_logic import VideoSchedulerAppLogic
+from gui import VideoSchedulerGUI
+finish_startup = VideoSchedulerGUI._finish_startup
+def timed_finish_startup(self):
+    marks['first_window'] = time.time()
+    finish_startup(self)
+    marks['ready'] = time.time()
+    self.after(0, self.destroy)
+VideoSchedulerGUI._finish_startup = timed_finish_startup
+app = VideoSchedulerGUI(VideoSchedulerAppLogic())
+app.mainloop()
+print(json.dumps(marks))
+"""
+
+
+def parse_importtime(stderr_text):
+    """Returns [(module, depth, self_us, cumulative_us)] from -X importtime output."""
+    entries = []
+    for line in stderr_text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def measure_imports(env):
+    """Imports main in a fresh interpreter. Returns (wall_ms, importtime entries)."""
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=REPO_DIR, env=env,
+                               capture_output=True, text=True, check=True)
+    return (time.perf_counter() - started) * 1000, parse_importtime(completed.stderr)
+
+
+def measure_window(env):
+    """Starts the GUI in a fresh interpreter. Returns {'first_window': ms, 'ready': ms} or None without a display."""
+    started = time.time()
+    completed = subprocess.run([sys.executable, "-c", WINDOW_PROBE], cwd=REPO_DIR, env=env,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        if "TclError" in completed.stderr:
+            return None  # No display available
+        raise RuntimeError(f"GUI startup failed:\n{completed.stderr}")
+    marks = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {name: (timestamp - started) * 1000 for name, timestamp in marks.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure GUI cold start against the startup budget.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement (median is reported)")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    parser.add_argument("--budget", default=DEFAULT_BUDGET_FILE, help="Budget file (JSON)")
+    args = parser.parse_args()
+
+    with open(args.budget, encoding="utf-8") as budget_file:
+        budget = json.load(budget_file)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        env = dict(os.environ, COURSE_SCHEDULER_DB=os.path.join(temp_dir, "startup_bench.db"))
+        env.pop("COURSE_SCHEDULER_DB_READ_ONLY", None)
+
+        import_runs = [measure_imports(env) for _ in range(args.repeat)]
+        window_runs = [measure_window(env) for _ in range(args.repeat)]
+
+    import_ms = statistics.median(wall_ms for wall_ms, _ in import_runs)
+    entries = import_runs[-1][1]
+    print(f"import main: {import_ms:.0f} ms wall (median of {args.repeat}, interpreter start included)")
+    print("\nSlowest imports (last run, cumulative):")
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for name, depth, self_us, cumulative_us in sorted(entries, key=lambda entry: -entry[3])[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f}  {'  ' * depth}{name}")
+
+    results = {'import_main_ms': import_ms}
+    if any(run is None for run in window_runs):
+        print("\nWindow timings skipped: no display available.")
+    else:
+        for mark in ('first_window', 'ready'):
+            results[f"{mark}_ms"] = statistics.median(run[mark] for run in window_runs)
+        print(f"\nTime to first window: {results['first_window_ms']:.0f} ms, "
+              f"course list ready: {results['ready_ms']:.0f} ms (median of {args.repeat})")
+
+    failures = []
+    for key, measured in results.items():
+        limit = budget.get(key)
+        if limit is not None and measured > limit:
+            failures.append(f"{key} = {measured:.0f} ms exceeds the budget of {limit} ms")
+    imported = {name for name, _, _, _ in entries}
+    for module in budget.get("deferred_modules", []):
+        if module in imported:
+            failures.append(f"'{module}' is imported at startup but should be deferred")
+
+    if failures:
+        print("\nStartup budget exceeded:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nWithin the startup budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# benchmarks/synthetic_course.py
+#
+# Generates reproducible synthetic course trees for benchmarks: nested chapter directories of tiny
+# but structurally valid MP4 and MKV files with known durations, plus matching subtitle files.
+# The files only carry container metadata (no media data), which is all the duration probe reads.
+#
+# Usage: python benchmarks/synthetic_course.py DIR [--videos 2000] [--seed 1]
+
+import argparse
+import json
+import os
+import random
+import struct
+
+# Videos per chapter directory, and how often a chapter gets a nested subchapter
+VIDEOS_PER_CHAPTER = 25
+SUBCHAPTER_EVERY = 4
+# Every n-th video gets a subtitle file next to it
+SUBTITLE_EVERY = 2
+
+
+def _mp4_box(box_type, payload):
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+def mp4_bytes(duration_seconds, timescale=1000):
+    """A minimal MP4: ftyp plus a moov box holding a version-0 mvhd with the duration."""
+    ftyp = _mp4_box(b'ftyp', b'isom' + struct.pack('>I', 0x200) + b'isommp41')
+    mvhd = _mp4_box(b'mvhd', struct.pack(
+        '>IIIIIIH10s36s24sI',
+        0,  # Version 0, no flags
+        0, 0,  # Creation and modification time
+        timescale,
+        round(duration_seconds * timescale),
+        0x00010000,  # Rate 1.0
+        0x0100,  # Volume 1.0
+        b'',  # Reserved
+        struct.pack('>9I', 0x00010000, 0, 0, 0, 0x00010000, 0, 0, 0, 0x40000000),  # Unity matrix
+        b'',  # Pre-defined
+        2,  # Next track id
+    ))
+    return ftyp + _mp4_box(b'moov', mvhd)
+
+
+def _ebml_element(element_id, payload):
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, 'big')
+    return id_bytes + b'\x01' + len(payload).to_bytes(7, 'big') + payload  # 8-byte size vint
+
+
+def _ebml_uint(element_id, value):
+    return _ebml_element(element_id, value.to_bytes(max(1, (value.bit_length() + 7) // 8), 'big'))
+
+
+def mkv_bytes(duration_seconds):
+    """A minimal Matroska file: EBML header, then a Segment whose Info holds TimecodeScale and Duration."""
+    header = _ebml_element(0x1A45DFA3, b''.join((
+        _ebml_uint(0x4286, 1),  # EBMLVersion
+        _ebml_uint(0x42F7, 1),  # EBMLReadVersion
+        _ebml_uint(0x42F2, 4),  # EBMLMaxIDLength
+        _ebml_uint(0x42F3, 8),  # EBMLMaxSizeLength
+        _ebml_element(0x4282, b'matroska'),  # DocType
+        _ebml_uint(0x4287, 4),  # DocTypeVersion
+        _ebml_uint(0x4285, 2),  # DocTypeReadVersion
+    )))
+    info = _ebml_element(0x1549A966, _ebml_uint(0x2AD7B1, 1000000)  # TimecodeScale: milliseconds
+                         + _ebml_element(0x4489, struct.pack('>d', duration_seconds * 1000)))
+    return header + _ebml_element(0x18538067, info)
+
+
+def subtitle_text(duration_seconds):
+    end = int(duration_seconds)
+    return f"1\n00:00:00,000 --> {end // 3600:02d}:{end % 3600 // 60:02d}:{end % 60:02d},000\nSynthetic subtitle\n"
+
+
+def write_video(path, duration_seconds):
+    """Writes an MP4 or MKV file (chosen by extension) with the given duration."""
+    data = mkv_bytes(duration_seconds) if path.endswith('.mkv') else mp4_bytes(duration_seconds)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def random_duration(rng):
+    """Durations in whole milliseconds, so both containers store them exactly."""
+    return round(rng.uniform(60, 1800), 3)
+
+
+def generate_course(root, video_count, seed=1):
+    """
+    Creates a course tree with `video_count` videos under `root`.
+    Returns a manifest {video_path: duration_seconds} of every generated video.
+    """
+    rng = random.Random(seed)
+    manifest = {}
+    os.makedirs(root, exist_ok=True)
+    chapter_number = 0
+    while len(manifest) < video_count:
+        chapter_number += 1
+        chapter_dir = os.path.join(root, f"Chapter {chapter_number:03d}")
+        directories = [chapter_dir]
+        if chapter_number % SUBCHAPTER_EVERY == 0:
+            directories.append(os.path.join(chapter_dir, f"Part {chapter_number:03d}.1"))
+        for directory in directories:
+            os.makedirs(directory, exist_ok=True)
+            for video_number in range(1, VIDEOS_PER_CHAPTER + 1):
+                if len(manifest) >= video_count:
+                    break
+                extension = '.mkv' if video_number % 3 == 0 else '.mp4'
+                video_path = os.path.join(directory, f"{video_number:03d} Lesson{extension}")
+                duration = random_duration(rng)
+                write_video(video_path, duration)
+                if video_number % SUBTITLE_EVERY == 0:
+                    with open(os.path.splitext(video_path)[0] + '.srt', 'w', encoding='utf-8') as f:
+                        f.write(subtitle_text(duration))
+                manifest[video_path] = duration
+    return manifest
+
+
+def change_course(manifest, fraction=0.05, seed=2):
+    """
+    Applies a partial change to a generated course: rewrites `fraction` of the videos with new durations,
+    deletes fraction / 2 and adds fraction / 2 new ones. Updates `manifest` in place and returns change counts.
+    """
+    rng = random.Random(seed)
+    paths = sorted(manifest)
+    count = max(1, int(len(paths) * fraction))
+    chosen = rng.sample(paths, min(len(paths), count + count // 2))
+    modified, deleted = chosen[:count], chosen[count:]
+    for path in modified:
+        manifest[path] = random_duration(rng)
+        write_video(path, manifest[path])
+    for path in deleted:
+        os.remove(path)
+        del manifest[path]
+    added = 0
+    for path in rng.sample(paths, max(1, count // 2)):
+        base, extension = os.path.splitext(path)
+        new_path = f"{base} (extra){extension}"
+        if new_path in manifest or not os.path.isdir(os.path.dirname(new_path)):
+            continue
+        manifest[new_path] = random_duration(rng)
+        write_video(new_path, manifest[new_path])
+        added += 1
+    return {'modified': len(modified), 'deleted': len(deleted), 'added': added}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic course tree.")
+    parser.add_argument("directory", help="Course folder to create")
+    parser.add_argument("--videos", type=int, default=2000, help="Number of videos")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for durations")
+    parser.add_argument("--manifest", help="Write {path: duration} as JSON to this file")
+    args = parser.parse_args()
+
+    manifest = generate_course(os.path.abspath(args.directory), args.videos, seed=args.seed)
+    print(f"Generated {len(manifest)} videos ({sum(manifest.values()) / 3600:.1f} hours) in {args.directory}")
+    if args.manifest:
+        with open(args.manifest, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
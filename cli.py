@@ -0,0 +1,269 @@
+# cli.py
+#
+# Command-line entry point for scripts, cron jobs and SSH sessions. It drives the same
+# VideoSchedulerAppLogic as the GUI, but never imports Tk or CustomTkinter
+# (and MoviePy only if a video needs the slow duration fallback).
+#
+# Usage: python -m cli [--db PATH] <command> ...
+#   import PATH [--name NAME]                     Import a course folder (or load it if already registered)
+#   rescan COURSE [--reprobe]                     Rescan a course folder for added, removed or changed videos
+#   schedule COURSE --days N --minutes M [--mode] Print a viewing schedule without saving it
+#   save-schedule COURSE --days N --minutes M     Generate a schedule and save it to the database
+#   status [COURSE]                               Show progress for all courses, or per chapter for one course
+#   export COURSE [--format csv|json] [--output]  Export per-video progress
+#   prune-cache [PATH]                            Remove probe cache entries for files that no longer exist
+# COURSE is a course id, name or folder path.
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+
+import database
+from app_logic import VideoSchedulerAppLogic
+from scheduler import SCHEDULE_MODE_SPLIT, SCHEDULE_MODES
+
+
+def _format_time(seconds):
+    """Formats time in seconds to HH:MM:SS format."""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    seconds = int(seconds % 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def _percent(part, total):
+    return (part or 0) / total * 100 if total else 0.0
+
+
+class CliReporter:
+    """GUI callbacks for the app logic: messages go to stderr, errors are remembered for the exit code."""
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self.had_error = False
+
+    def callbacks(self):
+        return {'show_message': self.show_message, 'update_progress': self.update_progress}
+
+    def show_message(self, message_text, message_type="info"):
+        if message_type == "error":
+            self.had_error = True
+        print(f"[{message_type.upper()}]: {message_text}", file=sys.stderr)
+
+    def update_progress(self, value, text=None):
+        if self.verbose and text:
+            print(f"  {text}", file=sys.stderr)
+
+
+def _find_course(logic, course_ref):
+    """Resolves a course id, name or folder path to a loaded course (None if there is no such course)."""
+    query = logic.db_session.query(database.Course)
+    course = None
+    if course_ref.isdigit():
+        course = query.filter(database.Course.id == int(course_ref)).first()
+    if course is None:
+        course = query.filter(database.Course.name == course_ref).first()
+    if course is None:
+        course = query.filter(database.Course.path == os.path.abspath(course_ref)).first()
+    if course is None:
+        print(f"Error: No course matches '{course_ref}'.", file=sys.stderr)
+        return None
+    logic.current_course = logic.load_course_graph(course.id)
+    return logic.current_course
+
+
+def _cmd_import(logic, args):
+    directory_path = os.path.abspath(args.path)
+    if not os.path.isdir(directory_path):
+        print(f"Error: '{directory_path}' is not a directory.", file=sys.stderr)
+        return 1
+    logic.load_or_import_course(directory_path, course_name=args.name)
+    return 0 if logic.current_course is not None else 1
+
+
+def _cmd_rescan(logic, args):
+    if _find_course(logic, args.course) is None:
+        return 1
+    logic.rescan_current_course(force_reprobe=args.reprobe)
+    return 0
+
+
+def _cmd_schedule(logic, args):
+    if _find_course(logic, args.course) is None:
+        return 1
+    schedule = logic.generate_schedule(str(args.days), str(args.minutes), args.mode)
+    if args.json:
+        json.dump(schedule, args.out, indent=2)
+        print(file=args.out)
+        return 0
+    for day_plan in schedule:
+        print(f"Day {day_plan['day']} - Total Time: {day_plan['total_time_minutes']:.1f} minutes", file=args.out)
+        for task in day_plan['tasks']:
+            print(f"    {task['chapter_name']} - {task['video_name']}  "
+                  f"{_format_time(task['start_time'])} to {_format_time(task['end_time'])} "
+                  f"({_format_time(task['duration'])})", file=args.out)
+    return 0
+
+
+def _cmd_save_schedule(logic, args):
+    if _find_course(logic, args.course) is None:
+        return 1
+    schedule = logic.generate_schedule(str(args.days), str(args.minutes), args.mode)
+    if not schedule:
+        print("Error: No schedule was generated, nothing saved.", file=sys.stderr)
+        return 1
+    result = logic.save_schedule(schedule, args.days, args.minutes)
+    if not result:
+        return 1
+    print(f"Schedule saved ({result['days']} days, {result['tasks']} tasks in {result['seconds'] * 1000:.0f} ms).",
+          file=args.out)
+    return 0
+
+
+def _cmd_status(logic, args):
+    if args.course is None:
+        courses = logic.get_course_index()
+        if not courses:
+            print("No courses found.", file=args.out)
+        for course in courses:
+            print(f"{course['id']:>4}  {course['name']}  {course['watched_video_count']}/{course['video_count']} videos  "
+                  f"{course['progress']:5.1f}% of {_format_time(course['total_duration_seconds'])}", file=args.out)
+        return 0
+
+    course = _find_course(logic, args.course)
+    if course is None:
+        return 1
+    print(f"Course: {course.name} ({course.path})", file=args.out)
+    print(f"Total Duration: {_format_time(course.total_duration_seconds or 0)}, "
+          f"{_percent(course.watched_seconds, course.total_duration_seconds):.1f}% watched", file=args.out)
+    for chapter in course.chapters:
+        print(f"  Chapter {chapter.order_in_course:02d}: {chapter.name}  "
+              f"{chapter.watched_video_count or 0}/{chapter.video_count or 0} watched "
+              f"({_percent(chapter.watched_seconds, chapter.videos_duration_seconds):.1f}%)", file=args.out)
+    return 0
+
+
+def _cmd_prune_cache(logic, args):
+    evicted = logic.evict_stale_probe_cache(os.path.abspath(args.path) if args.path else None)
+    print(f"Removed {evicted} probe cache entries for missing files.", file=args.out)
+    return 0
+
+
+EXPORT_FIELDS = ('chapter', 'video', 'path', 'duration_seconds', 'watched_seconds', 'status')
+
+
+def _cmd_export(logic, args):
+    course = _find_course(logic, args.course)
+    if course is None:
+        return 1
+    rows = [{
+        'chapter': chapter.name,
+        'video': video.name,
+        'path': video.path,
+        'duration_seconds': video.duration_seconds,
+        'watched_seconds': video.watched_seconds or 0.0,
+        'status': video.watched_status.value,
+    } for chapter in course.chapters for video in chapter.videos]
+
+    output = open(args.output, 'w', newline='', encoding='utf-8') if args.output else args.out
+    try:
+        if args.format == 'json':
+            json.dump({'course': course.name, 'path': course.path, 'videos': rows}, output, indent=2, ensure_ascii=False)
+            output.write("\n")
+        else:
+            writer = csv.DictWriter(output, fieldnames=EXPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    finally:
+        if output is not args.out:
+            output.close()
+    return 0
+
+
+def _add_schedule_arguments(parser):
+    parser.add_argument("course", help="Course id, name or folder path")
+    parser.add_argument("--days", type=int, required=True, help="Number of days")
+    parser.add_argument("--minutes", type=int, required=True, help="Maximum viewing minutes per day")
+    parser.add_argument("--mode", choices=SCHEDULE_MODES, default=SCHEDULE_MODE_SPLIT, help="Scheduling mode")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Video course scheduler (command line).")
+    parser.add_argument("--db", help=f"Database file (default: ${database.DATABASE_PATH_ENV_VAR} "
+                                     f"or {database.DATABASE_FILE})")
+    parser.add_argument("--probe-workers", type=int, default=None,
+                        help="Processes used to probe videos (default: one per CPU, 1 = no pool)")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Print scan progress and the timing breakdown of the last operation")
+    parser.add_argument("--slow-query-ms", type=float, default=None,
+                        help=f"Print SQL statements slower than this (default: ${database.SLOW_QUERY_THRESHOLD_ENV_VAR} "
+                             f"or {database.DEFAULT_SLOW_QUERY_THRESHOLD_MS})")
+    parser.add_argument("--profile", action="store_true",
+                        help="Run the command's first operation under cProfile and print the breakdown")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Import a course folder")
+    import_parser.add_argument("path", help="Course folder")
+    import_parser.add_argument("--name", help="Course name (default: the folder name)")
+    import_parser.set_defaults(handler=_cmd_import)
+
+    rescan_parser = subparsers.add_parser("rescan", help="Rescan a course folder for changes")
+    rescan_parser.add_argument("course", help="Course id, name or folder path")
+    rescan_parser.add_argument("--reprobe", action="store_true", help="Probe every video again, ignoring the cache")
+    rescan_parser.set_defaults(handler=_cmd_rescan)
+
+    schedule_parser = subparsers.add_parser("schedule", help="Print a viewing schedule (not saved)")
+    _add_schedule_arguments(schedule_parser)
+    schedule_parser.add_argument("--json", action="store_true", help="Print the schedule as JSON")
+    schedule_parser.set_defaults(handler=_cmd_schedule)
+
+    save_parser = subparsers.add_parser("save-schedule", help="Generate a viewing schedule and save it")
+    _add_schedule_arguments(save_parser)
+    save_parser.set_defaults(handler=_cmd_save_schedule)
+
+    status_parser = subparsers.add_parser("status", help="Show watch progress")
+    status_parser.add_argument("course", nargs="?", help="Course id, name or folder path (default: all courses)")
+    status_parser.set_defaults(handler=_cmd_status)
+
+    export_parser = subparsers.add_parser("export", help="Export per-video progress")
+    export_parser.add_argument("course", help="Course id, name or folder path")
+    export_parser.add_argument("--format", choices=("csv", "json"), default="csv", help="Output format")
+    export_parser.add_argument("--output", "-o", help="Output file (default: stdout)")
+    export_parser.set_defaults(handler=_cmd_export)
+
+    prune_parser = subparsers.add_parser("prune-cache", help="Remove probe cache entries for files that no longer exist")
+    prune_parser.add_argument("path", nargs="?", help="Only check files below this folder (default: all)")
+    prune_parser.set_defaults(handler=_cmd_prune_cache)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.db:
+        database.configure_database(path=args.db)
+    if args.slow_query_ms is not None:
+        database.slow_query_threshold_ms = args.slow_query_ms
+
+    # Command output goes to stdout; the app logic's own console logging is moved to stderr
+    # so that exported CSV/JSON can be piped
+    args.out = sys.stdout
+    reporter = CliReporter(verbose=args.verbose)
+    with contextlib.redirect_stdout(sys.stderr):
+        logic = VideoSchedulerAppLogic(probe_workers=args.probe_workers)
+        logic.initialize_database()
+        logic.register_gui_callbacks(**reporter.callbacks())
+        logic.profile_next_operation = args.profile
+        try:
+            exit_code = args.handler(logic, args)
+        finally:
+            logic.close_db_session()
+        if (args.verbose or args.profile) and logic.last_trace is not None:
+            print(f"\n{logic.last_trace.format_report()}")
+    return exit_code or (1 if reporter.had_error else 0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,18 @@
 # database.py
 
 import enum
+import os
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Float, ForeignKey, DateTime, Enum as SAEnum
+from pathlib import Path
+from dotenv import load_dotenv
+from sqlalchemy import (
+    bindparam, create_engine, event, func, inspect, select, update, Column, Integer, String, Float, ForeignKey, DateTime, Index,
+    Enum as SAEnum
+)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import relationship, sessionmaker, declarative_base
 
 # Base class for declarative models
@@ -16,18 +26,34 @@ class WatchedStatusEnum(enum.Enum):
     WATCHED = "Watched"
 
 
+# Enum for the outcome of a video duration probe
+class ProbeStatusEnum(enum.Enum):
+    OK = "OK"
+    FAILED = "Failed"
+    TIMED_OUT = "Timed Out"
+
+
 class Course(Base):
     __tablename__ = 'courses'
+    __table_args__ = (
+        Index('ix_courses_path', 'path', unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     path = Column(String, nullable=False)
     total_duration_seconds = Column(Float, default=0)
+    # Progress aggregates over all videos of the course (see refresh_progress_aggregates)
+    watched_seconds = Column(Float, default=0)
+    video_count = Column(Integer, default=0)
+    watched_video_count = Column(Integer, default=0)
+    partially_watched_video_count = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationship to chapters, ordered by their order in the course
-    chapters = relationship("Chapter", back_populates="course", cascade="all, delete-orphan")
+    chapters = relationship("Chapter", back_populates="course", cascade="all, delete-orphan",
+                            order_by="[Chapter.order_in_course, Chapter.id]")
     schedules = relationship("Schedule", back_populates="course", cascade="all, delete-orphan")
 
     def __repr__(self):
@@ -36,17 +62,27 @@ class Course(Base):
 
 class Chapter(Base):
     __tablename__ = 'chapters'
+    __table_args__ = (
+        Index('ix_chapters_course_id_path', 'course_id', 'path', unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     path = Column(String, nullable=False)  # Full path to the chapter directory
-    order_in_course = Column(Integer, nullable=False)  # Order of this chapter within the course
-    total_duration_seconds = Column(Float, default=0)
+    order_in_course = Column(Integer, nullable=False)  # Depth-first position of this chapter within the course
+    total_duration_seconds = Column(Float, default=0)  # Includes the videos of subchapters
+    # Progress aggregates over this chapter's own videos (see refresh_progress_aggregates)
+    videos_duration_seconds = Column(Float, default=0)
+    watched_seconds = Column(Float, default=0)
+    video_count = Column(Integer, default=0)
+    watched_video_count = Column(Integer, default=0)
+    partially_watched_video_count = Column(Integer, default=0)
     course_id = Column(Integer, ForeignKey('courses.id'), nullable=False)
 
     course = relationship("Course", back_populates="chapters")
     # Relationship to videos, ordered by their order in the chapter
-    videos = relationship("Video", back_populates="chapter", cascade="all, delete-orphan")
+    videos = relationship("Video", back_populates="chapter", cascade="all, delete-orphan",
+                          order_by="[Video.order_in_chapter, Video.id]")
 
     def __repr__(self):
         return f"<Chapter(name='{self.name}', course_id={self.course_id})>"
@@ -54,6 +90,9 @@ class Chapter(Base):
 
 class Video(Base):
     __tablename__ = 'videos'
+    __table_args__ = (
+        Index('ix_videos_chapter_id_path', 'chapter_id', 'path', unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)  # Video file name
@@ -74,6 +113,9 @@ class Video(Base):
 
 class Schedule(Base):
     __tablename__ = 'schedules'
+    __table_args__ = (
+        Index('ix_schedules_course_id_params', 'course_id', 'num_days', 'max_daily_minutes'),
+    )
 
     id = Column(Integer, primary_key=True)
     course_id = Column(Integer, ForeignKey('courses.id'), nullable=False)
@@ -88,6 +130,9 @@ class Schedule(Base):
 
 class DailySchedule(Base):
     __tablename__ = 'daily_schedules'
+    __table_args__ = (
+        Index('ix_daily_schedules_schedule_id', 'schedule_id'),
+    )
 
     id = Column(Integer, primary_key=True)
     schedule_id = Column(Integer, ForeignKey('schedules.id'), nullable=False)
@@ -101,6 +146,10 @@ class DailySchedule(Base):
 
 class ScheduleTask(Base):
     __tablename__ = 'schedule_tasks'
+    __table_args__ = (
+        Index('ix_schedule_tasks_video_id', 'video_id'),
+        Index('ix_schedule_tasks_daily_schedule_id', 'daily_schedule_id'),
+    )
 
     id = Column(Integer, primary_key=True)
     daily_schedule_id = Column(Integer, ForeignKey('daily_schedules.id'), nullable=False)
@@ -116,20 +165,356 @@ class ScheduleTask(Base):
     video = relationship("Video", back_populates="schedule_tasks")
 
 
-# --- Database Setup ---
-DATABASE_FILE = "course_scheduler.db"  # Database file will be in the same directory as the script
-DATABASE_URL = f"sqlite:///./{DATABASE_FILE}"
+class ProbeCacheEntry(Base):
+    """Cached probe result for a video file, valid while the file's size, mtime and inode are unchanged."""
+    __tablename__ = 'probe_cache'
 
-# `check_same_thread=False` is needed for SQLite when used with a GUI thread (like Tkinter/CustomTkinter).
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    id = Column(Integer, primary_key=True)
+    path = Column(String, nullable=False, unique=True)
+    file_size = Column(Integer, nullable=False)
+    mtime_ns = Column(Integer, nullable=False)
+    inode = Column(Integer, nullable=False)
+    duration_seconds = Column(Float, nullable=True)  # None when the probe failed
+    subtitle_path = Column(String, nullable=True)
+    status = Column(SAEnum(ProbeStatusEnum), nullable=False)
+    probed_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ProbeCacheEntry(path='{self.path}', status={self.status})>"
 
-# SessionLocal is a factory for creating database sessions
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# --- Database Setup ---
+# The database location defaults to the current working directory and can be overridden with the
+# COURSE_SCHEDULER_DB environment variable, set in the shell or in a .env file.
+load_dotenv()
+
+DATABASE_FILE = "course_scheduler.db"
+DATABASE_PATH_ENV_VAR = "COURSE_SCHEDULER_DB"
+DATABASE_READ_ONLY_ENV_VAR = "COURSE_SCHEDULER_DB_READ_ONLY"
+
+# Applied to every new connection. WAL with synchronous=NORMAL keeps commits (e.g. each progress
+# update) from waiting on a full fsync while remaining safe against application crashes.
+SQLITE_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("foreign_keys", "ON"),
+    ("mmap_size", 256 * 1024 * 1024),
+    ("cache_size", -64 * 1024),  # Negative values are in KiB, i.e. 64 MiB
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", 10000),  # Milliseconds a connection waits for another one's write lock before failing
+)
+# Pragmas that write to the database file and so cannot be applied to a read-only connection
+SQLITE_WRITE_PRAGMAS = ("journal_mode", "synchronous")
+
+engine = None
+SessionLocal = None
+database_path = None
+read_only = False
+
+
+def _apply_sqlite_pragmas(dbapi_connection, is_read_only):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS:
+            if is_read_only and name in SQLITE_WRITE_PRAGMAS:
+                continue
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+# --- Query Accounting ---
+# Every statement the engine runs is timed. Statements slower than the threshold are printed with their
+# parameters, and count_queries() / query_budget() count the statements and DB time of a block of code.
+
+SLOW_QUERY_THRESHOLD_ENV_VAR = "COURSE_SCHEDULER_SLOW_QUERY_MS"
+DEFAULT_SLOW_QUERY_THRESHOLD_MS = 100
+# Parameter sets printed for a slow executemany statement, and characters printed per parameter set
+SLOW_QUERY_MAX_PARAMETER_SETS = 3
+SLOW_QUERY_MAX_PARAMETER_CHARS = 300
+# Statements listed in a QueryBudgetExceeded message
+QUERY_BUDGET_MAX_LISTED_STATEMENTS = 20
+
+slow_query_threshold_ms = DEFAULT_SLOW_QUERY_THRESHOLD_MS
+_query_accounting = threading.local()  # .active: the QueryStats collecting on this thread
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised by query_budget() when a block runs more SQL statements than its budget allows."""
+
+
+class QueryStats:
+    """Statements (cursor executions; an executemany counts once) and DB time collected by count_queries()."""
+
+    def __init__(self, record_statements=False):
+        self.statements = 0
+        self.seconds = 0.0
+        self.slow_statements = 0
+        self.statement_log = [] if record_statements else None
+
+
+@contextmanager
+def count_queries(record_statements=False):
+    """
+    Counts the SQL statements run on this thread inside the block, and the time spent in them.
+    Yields a QueryStats; with `record_statements`, the SQL of every statement is kept in its statement_log.
+    Blocks may be nested; each one counts everything run inside it.
+    """
+    stats = QueryStats(record_statements)
+    active = _query_accounting.__dict__.setdefault('active', [])
+    active.append(stats)
+    try:
+        yield stats
+    finally:
+        active.remove(stats)
+
+
+@contextmanager
+def query_budget(max_statements, label="Block"):
+    """
+    Raises QueryBudgetExceeded when the block runs more than `max_statements` SQL statements,
+    so that N+1 query regressions fail loudly. Yields the block's QueryStats.
+    """
+    with count_queries(record_statements=True) as stats:
+        yield stats
+    if stats.statements > max_statements:
+        listed = "\n".join(f"  {statement}" for statement in stats.statement_log[:QUERY_BUDGET_MAX_LISTED_STATEMENTS])
+        more = stats.statements - QUERY_BUDGET_MAX_LISTED_STATEMENTS
+        raise QueryBudgetExceeded(f"{label} ran {stats.statements} SQL statements, over its budget of {max_statements}:\n"
+                                  f"{listed}" + (f"\n  ... and {more} more" if more > 0 else ""))
+
+
+def _format_query_parameters(parameters, executemany):
+    def shorten(parameter_set):
+        text = repr(parameter_set)
+        return text if len(text) <= SLOW_QUERY_MAX_PARAMETER_CHARS else text[:SLOW_QUERY_MAX_PARAMETER_CHARS] + "...)"
+
+    if not executemany:
+        return shorten(parameters)
+    shown = ", ".join(shorten(parameter_set) for parameter_set in parameters[:SLOW_QUERY_MAX_PARAMETER_SETS])
+    more = len(parameters) - SLOW_QUERY_MAX_PARAMETER_SETS
+    return f"[{shown}" + (f", ... ({more} more)]" if more > 0 else "]")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context.query_started
+    is_slow = elapsed * 1000 >= slow_query_threshold_ms
+    for stats in getattr(_query_accounting, 'active', ()):
+        stats.statements += 1
+        stats.seconds += elapsed
+        stats.slow_statements += is_slow
+        if stats.statement_log is not None:
+            stats.statement_log.append(" ".join(statement.split()))
+    if is_slow:
+        print(f"Slow query ({elapsed * 1000:.1f} ms): {' '.join(statement.split())}\n"
+              f"  Parameters: {_format_query_parameters(parameters, executemany)}")
+
+
+def configure_database(path=None, read_only_mode=None):
+    """
+    (Re)creates the engine and session factory for the given database file.
+    If `path` or `read_only_mode` are not given, they are read from the environment.
+    A read-only database is opened with SQLite's `mode=ro`, so any write attempt fails.
+    The slow-query threshold is read from $COURSE_SCHEDULER_SLOW_QUERY_MS if set.
+    """
+    global engine, SessionLocal, database_path, read_only, slow_query_threshold_ms
+
+    if path is None:
+        path = os.environ.get(DATABASE_PATH_ENV_VAR) or os.path.join(".", DATABASE_FILE)
+    if read_only_mode is None:
+        read_only_mode = os.environ.get(DATABASE_READ_ONLY_ENV_VAR, "").lower() in ("1", "true", "yes")
+    path = os.path.expanduser(path)
+
+    if read_only_mode:
+        database_url = f"sqlite:///{Path(path).resolve().as_uri()}?mode=ro&uri=true"
+    else:
+        database_url = f"sqlite:///{path}"
+
+    if engine is not None:
+        engine.dispose()
+
+    # `check_same_thread=False` is needed for SQLite when used with a GUI thread (like Tkinter/CustomTkinter).
+    engine = create_engine(database_url, connect_args={"check_same_thread": False})
+    event.listen(engine, "connect",
+                 lambda dbapi_connection, connection_record: _apply_sqlite_pragmas(dbapi_connection, read_only_mode))
+    # Query accounting and the slow-query log (see count_queries)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    threshold_setting = os.environ.get(SLOW_QUERY_THRESHOLD_ENV_VAR)
+    if threshold_setting:
+        try:
+            slow_query_threshold_ms = float(threshold_setting)
+        except ValueError:
+            print(f"Warning: ${SLOW_QUERY_THRESHOLD_ENV_VAR} is not a number ('{threshold_setting}'); "
+                  f"using the default slow-query threshold of {DEFAULT_SLOW_QUERY_THRESHOLD_MS} ms.")
+            slow_query_threshold_ms = DEFAULT_SLOW_QUERY_THRESHOLD_MS
+
+    # SessionLocal is a factory for creating database sessions
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    database_path = path
+    read_only = read_only_mode
+    return engine
+
+
+configure_database()
 
 
 def create_db_and_tables():
-    """Creates database tables if they don't already exist."""
-    Base.metadata.create_all(bind=engine)
+    """
+    Creates database tables if they don't already exist.
+    A brand-new database already matches the models, so it is stamped with the current schema version.
+    """
+    with engine.begin() as connection:
+        is_new_database = not inspect(connection).get_table_names()
+        Base.metadata.create_all(bind=connection)
+        if is_new_database:
+            _set_schema_version(connection, SCHEMA_VERSION)
+
+
+# --- Progress Aggregates ---
+
+def refresh_progress_aggregates(connection, course_ids=None):
+    """
+    Recomputes the watched-seconds and video-status aggregates of chapters (from their own videos)
+    and courses (from their chapters) with two set-based UPDATEs.
+    `connection` may be a Connection or a Session; `course_ids` limits the refresh to those courses.
+    """
+    chapters = Chapter.__table__
+    courses = Course.__table__
+    videos = Video.__table__
+
+    def chapter_videos(aggregate, *conditions):
+        return select(aggregate).where(videos.c.chapter_id == chapters.c.id, *conditions).scalar_subquery()
+
+    def course_chapters(column):
+        return select(func.coalesce(func.sum(column), 0)).where(chapters.c.course_id == courses.c.id).scalar_subquery()
+
+    chapter_update = update(chapters).values(
+        videos_duration_seconds=chapter_videos(func.coalesce(func.sum(videos.c.duration_seconds), 0)),
+        watched_seconds=chapter_videos(func.coalesce(func.sum(videos.c.watched_seconds), 0)),
+        video_count=chapter_videos(func.count()),
+        watched_video_count=chapter_videos(func.count(), videos.c.watched_status == WatchedStatusEnum.WATCHED),
+        partially_watched_video_count=chapter_videos(
+            func.count(), videos.c.watched_status == WatchedStatusEnum.PARTIALLY_WATCHED),
+    )
+    course_update = update(courses).values(
+        watched_seconds=course_chapters(chapters.c.watched_seconds),
+        video_count=course_chapters(chapters.c.video_count),
+        watched_video_count=course_chapters(chapters.c.watched_video_count),
+        partially_watched_video_count=course_chapters(chapters.c.partially_watched_video_count),
+    )
+    if course_ids is not None:
+        chapter_update = chapter_update.where(chapters.c.course_id.in_(course_ids))
+        course_update = course_update.where(courses.c.id.in_(course_ids))
+    connection.execute(chapter_update)
+    connection.execute(course_update)
+
+
+# --- Schema Migrations ---
+# Each migration upgrades an existing database by one version. Migrations must be idempotent,
+# since tables created by create_all on an older database may already contain the new schema.
+
+def _get_schema_version(connection):
+    return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def _set_schema_version(connection, version):
+    connection.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+
+
+def _create_index_if_missing(connection, index):
+    """
+    Creates an index unless it already exists. If existing duplicate rows prevent a unique index,
+    it is created as a plain index so lookups still get faster.
+    """
+    try:
+        index.create(bind=connection, checkfirst=True)
+    except IntegrityError:
+        columns = ", ".join(column.name for column in index.columns)
+        print(f"Warning: Duplicate rows in '{index.table.name}' prevent unique index '{index.name}'. "
+              f"Creating it as a non-unique index.")
+        connection.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {index.name} ON {index.table.name} ({columns})")
+
+
+def _add_column_if_missing(connection, column):
+    """Adds a model column to an existing table (with its scalar default) unless the table already has it."""
+    table_name = column.table.name
+    if column.name in {existing['name'] for existing in inspect(connection).get_columns(table_name)}:
+        return
+    column_type = column.type.compile(dialect=connection.dialect)
+    default_clause = f" DEFAULT {column.default.arg}" if column.default is not None else ""
+    connection.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {column.name} {column_type}{default_clause}")
+
+
+def _migration_001_lookup_indexes(connection):
+    for model in (Course, Chapter, Video, Schedule, DailySchedule, ScheduleTask):
+        for index in model.__table__.indexes:
+            _create_index_if_missing(connection, index)
+
+
+def _migration_002_remove_orphaned_schedule_rows(connection):
+    # Older versions deleted schedules without their days and tasks; with foreign keys enforced
+    # these orphans would block later deletes and could be picked up by a reused schedule id.
+    orphaned_days = "SELECT id FROM daily_schedules WHERE schedule_id NOT IN (SELECT id FROM schedules)"
+    connection.exec_driver_sql(
+        f"DELETE FROM schedule_tasks WHERE daily_schedule_id IN ({orphaned_days})"
+        " OR daily_schedule_id NOT IN (SELECT id FROM daily_schedules)"
+        " OR video_id NOT IN (SELECT id FROM videos)")
+    connection.exec_driver_sql(f"DELETE FROM daily_schedules WHERE id IN ({orphaned_days})")
+
+
+def _migration_003_progress_aggregates(connection):
+    for column in (Chapter.videos_duration_seconds, Chapter.watched_seconds, Chapter.video_count,
+                   Chapter.watched_video_count, Chapter.partially_watched_video_count,
+                   Course.watched_seconds, Course.video_count, Course.watched_video_count,
+                   Course.partially_watched_video_count):
+        _add_column_if_missing(connection, column.property.columns[0])
+    refresh_progress_aggregates(connection)
+
+
+def _migration_004_depth_first_chapter_order(connection):
+    # Subchapters used to get their parent's order + 1, so orders repeated across nesting levels and
+    # Course.chapters interleaved them (A, A1, B, A1a). A scan lists chapters depth-first with siblings
+    # sorted by name, which is the order of their path components below the course folder.
+    chapters = Chapter.__table__
+    course_paths = dict(connection.execute(select(Course.__table__.c.id, Course.__table__.c.path)).all())
+    course_chapters = {}
+    for chapter_id, course_id, chapter_path in connection.execute(
+            select(chapters.c.id, chapters.c.course_id, chapters.c.path)):
+        relative_path = os.path.relpath(chapter_path, course_paths[course_id])
+        path_components = () if relative_path == os.curdir else tuple(relative_path.split(os.sep))
+        course_chapters.setdefault(course_id, []).append((path_components, chapter_id))
+    rows = [{'row_id': chapter_id, 'order_in_course': order}
+            for chapter_keys in course_chapters.values()
+            for order, (_, chapter_id) in enumerate(sorted(chapter_keys), start=1)]
+    if rows:
+        connection.execute(update(chapters).where(chapters.c.id == bindparam('row_id')), rows)
+
+
+# (version, description, function) in ascending version order
+MIGRATIONS = [
+    (1, "Add lookup indexes and uniqueness constraints", _migration_001_lookup_indexes),
+    (2, "Remove schedule rows orphaned by earlier schedule saves", _migration_002_remove_orphaned_schedule_rows),
+    (3, "Add chapter and course progress aggregates", _migration_003_progress_aggregates),
+    (4, "Renumber chapters in depth-first course order", _migration_004_depth_first_chapter_order),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def run_migrations():
+    """Applies pending schema migrations to an existing database (version tracked in PRAGMA user_version)."""
+    with engine.begin() as connection:
+        current_version = _get_schema_version(connection)
+        for version, description, migrate in MIGRATIONS:
+            if version <= current_version:
+                continue
+            print(f"Applying database migration {version}: {description}")
+            migrate(connection)
+            _set_schema_version(connection, version)
 
 
 def get_db_session():
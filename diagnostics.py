@@ -0,0 +1,112 @@
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+from datetime import datetime
+
+# Functions listed (by cumulative time) when an operation is profiled
+PROFILE_TOP_FUNCTIONS = 30
+
+
+class OperationTrace:
+    """
+    Timing spans and counters for one high-level operation (an import, rescan, schedule save, ...).
+    Spans with the same phase name are summed; spans may nest, so phase times can overlap
+    (e.g. "subtitle lookup" is part of "directory walk").
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = datetime.now()
+        self.total_seconds = None
+        self.phases = {}  # phase -> [seconds, calls], in first-use order
+        self.counters = {}
+        self.error = None
+        self.profile_text = None
+        self._started = time.perf_counter()
+
+    @contextlib.contextmanager
+    def span(self, phase):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - started)
+
+    def add_time(self, phase, seconds, calls=1):
+        totals = self.phases.setdefault(phase, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += calls
+
+    def count(self, counter, amount=1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def finish(self):
+        self.total_seconds = time.perf_counter() - self._started
+
+    def as_dict(self):
+        return {
+            'operation': self.name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'total_ms': round((self.total_seconds or 0.0) * 1000, 3),
+            'phases': {phase: {'ms': round(seconds * 1000, 3), 'calls': calls}
+                       for phase, (seconds, calls) in self.phases.items()},
+            'counters': dict(self.counters),
+            'error': self.error,
+            'profile': self.profile_text,
+        }
+
+    def format_report(self):
+        """Multi-line text breakdown, as shown in the Diagnostics panel."""
+        total_ms = (self.total_seconds or 0.0) * 1000
+        lines = [f"{self.name}  ({self.started_at:%H:%M:%S}, {total_ms:.1f} ms total)"]
+        if self.error:
+            lines.append(f"Failed: {self.error}")
+        if self.phases:
+            lines.append("")
+            lines.append(f"{'Phase':<28}{'ms':>10}{'%':>7}{'calls':>8}")
+            for phase, (seconds, calls) in sorted(self.phases.items(), key=lambda item: -item[1][0]):
+                share = seconds * 1000 / total_ms * 100 if total_ms else 0.0
+                lines.append(f"{phase:<28}{seconds * 1000:>10.1f}{share:>7.1f}{calls:>8}")
+        if self.counters:
+            lines.append("")
+            for counter, value in self.counters.items():
+                lines.append(f"{counter:<28}{value:>10}")
+        if self.profile_text:
+            lines.append("")
+            lines.append(self.profile_text)
+        return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def profiled(trace):
+    """Runs the block under cProfile and stores the top functions (by cumulative time) on `trace`."""
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:  # Another profiler is already active
+        print(f"Profiling unavailable: {e}")
+        yield
+        return
+    try:
+        yield
+    finally:
+        profiler.disable()
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        trace.profile_text = output.getvalue().strip()
+
+
+def append_to_log(trace, log_path):
+    """Appends the trace to `log_path` as one JSON line. Logging failures are printed, never raised."""
+    try:
+        directory = os.path.dirname(log_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(log_path, 'a', encoding='utf-8') as log_file:
+            log_file.write(json.dumps(trace.as_dict(), ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"Could not write diagnostics log '{log_path}': {e}")
@@ -1,7 +1,28 @@
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import customtkinter as ctk
 import tkinter as tk
+import traceback
 from database import WatchedStatusEnum, Video
+from scheduler import SCHEDULE_MODE_CHAPTERS, SCHEDULE_MODE_NO_SPLIT, SCHEDULE_MODE_SPLIT
+
+# How often (ms) the GUI drains updates queued by background scans
+APP_LOGIC_POLL_INTERVAL_MS = 50
+
+# Delay (ms) after the last keystroke before the schedule hint is recomputed
+SCHEDULE_HINT_DELAY_MS = 150
+
+# Delay (ms) after the last keystroke in the course search box before the list is filtered
+COURSE_FILTER_DELAY_MS = 150
+
+# Video rows inserted per after() slice when expanding every chapter of the course tree
+EXPAND_ALL_ROWS_PER_SLICE = 200
+
+# Scheduling modes offered in the Schedule tab, in menu order
+SCHEDULE_MODE_LABELS = {
+    "Split videos to fill each day": SCHEDULE_MODE_SPLIT,
+    "Whole videos, balanced days": SCHEDULE_MODE_NO_SPLIT,
+    "Keep chapters together": SCHEDULE_MODE_CHAPTERS,
+}
 
 
 class VideoSchedulerGUI(ctk.CTk):
@@ -17,12 +38,18 @@ class VideoSchedulerGUI(ctk.CTk):
         # Register GUI update callbacks with the app logic
         self.app_logic.register_gui_callbacks(
             display_course_info=self.display_course_info_in_treeview,
+            update_video_row=self.update_video_row_in_treeview,
             show_message=self.show_status_message,
             update_course_list_display=self.update_course_list_display,
+            update_course_row=self.update_course_row,
             update_progress=self.update_progress,
             show_progress_dialog=self.show_progress_dialog,
-            hide_progress_dialog=self.hide_progress_dialog
+            hide_progress_dialog=self.hide_progress_dialog,
+            update_diagnostics=self.update_diagnostics_panel
         )
+        # Scans run on a worker thread; their GUI updates are drained from a queue on the Tk thread
+        self.app_logic.background_scans = True
+        self._poll_app_logic_queue()
 
         # --- Progress Dialog ---
         self.progress_dialog = None
@@ -42,7 +69,8 @@ class VideoSchedulerGUI(ctk.CTk):
         search_frame.pack(fill=ctk.X, padx=5, pady=5)
         
         self.search_var = tk.StringVar()
-        self.search_var.trace('w', self.filter_courses)
+        self.search_var.trace('w', self._schedule_course_filter)
+        self._course_filter_job = None
         
         search_entry = ctk.CTkEntry(search_frame, textvariable=self.search_var, placeholder_text="جستجوی دوره...")
         search_entry.pack(fill=ctk.X, padx=5, pady=5)
@@ -74,6 +102,12 @@ class VideoSchedulerGUI(ctk.CTk):
         self.course_listbox_frame = ctk.CTkFrame(self.canvas)
         self.canvas_window = self.canvas.create_window((0, 0), window=self.course_listbox_frame, anchor="nw")
 
+        # Course rows are created once per course and then shown, hidden or relabelled, never rebuilt
+        self._course_index = []
+        self._course_rows = {}  # course id -> (row frame, load button)
+        self._visible_course_ids = []
+        self._no_courses_label = ctk.CTkLabel(self.course_listbox_frame, text="No courses found.")
+
         # Bind mouse wheel events for scrolling
         self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
         self.canvas.bind_all("<Shift-MouseWheel>", self._on_shift_mousewheel)
@@ -89,21 +123,25 @@ class VideoSchedulerGUI(ctk.CTk):
         self.resize_handle.bind("<B1-Motion>", self._on_resize)
         self.resize_handle.bind("<ButtonRelease-1>", self._stop_resize)
 
-        btn_add_course = ctk.CTkButton(self.courses_management_frame, text="Add/Load New Course", command=self.app_logic.select_and_load_course)
+        btn_add_course = ctk.CTkButton(self.courses_management_frame, text="Add/Load New Course", command=self.select_and_load_course)
         btn_add_course.pack(pady=(10, 5), fill=ctk.X, padx=5)
 
         btn_rescan_course = ctk.CTkButton(self.courses_management_frame, text="Rescan Current Course", command=self.on_rescan_button_click)
         btn_rescan_course.pack(pady=5, fill=ctk.X, padx=5)
 
+        btn_reprobe_course = ctk.CTkButton(self.courses_management_frame, text="Rescan and Re-probe Videos", command=self.on_reprobe_button_click)
+        btn_reprobe_course.pack(pady=5, fill=ctk.X, padx=5)
+
         # --- Right panel: Course Details and Scheduling ---
         self.details_and_schedule_frame = ctk.CTkFrame(main_frame)
         self.details_and_schedule_frame.pack(side=ctk.LEFT, fill=ctk.BOTH, expand=True)  # Takes remaining space
 
         # Tab view for details and schedule
-        self.tab_view = ctk.CTkTabview(self.details_and_schedule_frame)
+        self.tab_view = ctk.CTkTabview(self.details_and_schedule_frame, command=self._on_tab_changed)
         self.tab_view.pack(fill=ctk.BOTH, expand=True, padx=5, pady=5)
         self.tab_view.add("Course Details")
         self.tab_view.add("Viewing Schedule")
+        self.tab_view.add("Diagnostics")
         self.tab_view.set("Course Details")  # Default tab
 
         # --- Tab 1: Course Details ---
@@ -112,18 +150,57 @@ class VideoSchedulerGUI(ctk.CTk):
         self._create_course_details_tab(course_details_tab_content)
 
         # --- Tab 2: Viewing Schedule ---
-        schedule_tab_content = self.tab_view.tab("Viewing Schedule")
+        # Built the first time the tab is selected (see _on_tab_changed)
+        self.schedule_tab_built = False
+        self.generated_schedule = None  # Variable to hold the generated schedule
 
-        self._create_schedule_tab(schedule_tab_content)
+        # --- Tab 3: Diagnostics ---
+        # Also built on first selection; shows the timing breakdown of the last operation
+        self.diagnostics_tab_built = False
 
         # --- Status Bar ---
         self.status_bar = ctk.CTkLabel(self, text="Ready", anchor=ctk.W, font=ctk.CTkFont(size=10))
         self.status_bar.pack(side=ctk.BOTTOM, fill=ctk.X, padx=10, pady=(0, 5))
 
-        # Initial load of course list
-        self.update_course_list_display()
         # Handle window close event
         self.protocol("WM_DELETE_WINDOW", self.on_closing_application)
+        # Database setup and the initial course list wait until the window has been drawn once
+        # (after_idle, then after 0: runs once the pending redraws are done)
+        self.after_idle(self.after, 0, self._finish_startup)
+
+    def _finish_startup(self):
+        """Startup work deferred until after the first paint: database setup, then the course list."""
+        try:
+            self.app_logic.initialize_database()
+        except Exception as e:
+            print(f"Error initializing the database: {e}")
+            traceback.print_exc()
+            self.show_status_message(f"Error opening the database: {e}", "error")
+            return
+        self.update_course_list_display()
+
+    def _on_tab_changed(self):
+        """Builds the schedule and diagnostics tabs the first time they are selected."""
+        if self.tab_view.get() == "Viewing Schedule" and not self.schedule_tab_built:
+            self._create_schedule_tab(self.tab_view.tab("Viewing Schedule"))
+            self.schedule_tab_built = True
+            self._schedule_hint_update()
+        elif self.tab_view.get() == "Diagnostics" and not self.diagnostics_tab_built:
+            self._create_diagnostics_tab(self.tab_view.tab("Diagnostics"))
+            self.diagnostics_tab_built = True
+            self.update_diagnostics_panel(self.app_logic.last_trace)
+
+    def _poll_app_logic_queue(self):
+        """Runs GUI updates queued by background scans, then re-arms itself."""
+        self.app_logic.process_gui_queue()
+        self.after(APP_LOGIC_POLL_INTERVAL_MS, self._poll_app_logic_queue)
+
+    def select_and_load_course(self):
+        """Asks for a course folder, then loads it (or imports it if it is new)."""
+        directory_path = filedialog.askdirectory(title="Select Main Course Folder")
+        if not directory_path:
+            return  # User cancelled
+        self.app_logic.load_or_import_course(directory_path)
 
     def on_rescan_button_click(self):
         """Handles the rescan button click event."""
@@ -132,42 +209,74 @@ class VideoSchedulerGUI(ctk.CTk):
         else:
             self.show_status_message("Please select or load a course to rescan.", "warning")
 
-    def update_course_list_display(self):
-        """Clears and repopulates the list of courses in the GUI."""
-        # Clear previous course list items
-        for widget in self.course_listbox_frame.winfo_children():
-            widget.destroy()
-
-        courses = self.app_logic.get_all_courses()
-        if not courses:
-            ctk.CTkLabel(self.course_listbox_frame, text="No courses found.").pack(pady=5, padx=5)
-            return
+    def on_reprobe_button_click(self):
+        """Handles the re-probe button click event (rescan ignoring cached video durations)."""
+        if self.app_logic.current_course:
+            self.app_logic.rescan_current_course(force_reprobe=True)
+        else:
+            self.show_status_message("Please select or load a course to rescan.", "warning")
 
-        for course in courses:
-            # Frame for each course item (button + delete button)
-            course_item_frame = ctk.CTkFrame(self.course_listbox_frame)
-            course_item_frame.pack(fill=ctk.X, pady=(2, 0), padx=2)
-
-            course_button_text = f"{course.name}"
-            if self.app_logic.current_course and self.app_logic.current_course.id == course.id:
-                course_button_text += " (Current)"
-
-            load_course_button = ctk.CTkButton(
-                course_item_frame,
-                text=course_button_text,
-                anchor="w",  # Align text to the left within the button
-                command=lambda c_id=course.id: self.app_logic.load_course_by_id(c_id)
-            )
-            load_course_button.pack(side=ctk.LEFT, fill=ctk.X, expand=True, padx=(0, 2))
-
-            delete_course_button = ctk.CTkButton(
-                course_item_frame,
-                text="X",
-                width=30,
-                fg_color="red", hover_color="darkred",  # Styling for delete button
-                command=lambda c_id=course.id, c_name=course.name: self.confirm_and_delete_course(c_id, c_name)
-            )
-            delete_course_button.pack(side=ctk.RIGHT)  # Delete button on the right of the item
+    def update_course_list_display(self):
+        """Refreshes the cached course index and syncs the course list rows with it."""
+        self._course_index = self.app_logic.get_course_index()
+        course_ids = {course['id'] for course in self._course_index}
+        for course_id in list(self._course_rows):
+            if course_id not in course_ids:  # Deleted course
+                self._course_rows.pop(course_id)[0].destroy()
+                if course_id in self._visible_course_ids:
+                    self._visible_course_ids.remove(course_id)
+
+        for course in self._course_index:
+            course_button_text = self._course_button_text(course)
+            if course['id'] in self._course_rows:
+                load_course_button = self._course_rows[course['id']][1]
+                if load_course_button.cget("text") != course_button_text:
+                    load_course_button.configure(text=course_button_text)
+            else:
+                self._course_rows[course['id']] = self._create_course_row(course, course_button_text)
+
+        self.filter_courses()
+
+    def update_course_row(self, course):
+        """Updates the progress shown on one course's list row (after a progress change) without reloading the index."""
+        for course_entry in self._course_index:
+            if course_entry['id'] == course.id:
+                course_entry['progress'] = self.app_logic.progress_percent(course.watched_seconds,
+                                                                           course.total_duration_seconds)
+                if course.id in self._course_rows:
+                    self._course_rows[course.id][1].configure(text=self._course_button_text(course_entry))
+                return
+
+    def _course_button_text(self, course):
+        """Text of a course's load button: name and watched percentage, marked when it is the current course."""
+        course_button_text = f"{course['name']} ({course['progress']:.0f}%)"
+        current_course = self.app_logic.current_course
+        if current_course is not None and course['id'] == current_course.id:
+            course_button_text += " (Current)"
+        return course_button_text
+
+    def _create_course_row(self, course, course_button_text):
+        """Creates the (unpacked) frame with the load and delete buttons of one course."""
+        # Frame for each course item (button + delete button)
+        course_item_frame = ctk.CTkFrame(self.course_listbox_frame)
+
+        load_course_button = ctk.CTkButton(
+            course_item_frame,
+            text=course_button_text,
+            anchor="w",  # Align text to the left within the button
+            command=lambda c_id=course['id']: self.app_logic.load_course_by_id(c_id)
+        )
+        load_course_button.pack(side=ctk.LEFT, fill=ctk.X, expand=True, padx=(0, 2))
+
+        delete_course_button = ctk.CTkButton(
+            course_item_frame,
+            text="X",
+            width=30,
+            fg_color="red", hover_color="darkred",  # Styling for delete button
+            command=lambda c_id=course['id'], c_name=course['name']: self.confirm_and_delete_course(c_id, c_name)
+        )
+        delete_course_button.pack(side=ctk.RIGHT)  # Delete button on the right of the item
+        return course_item_frame, load_course_button
 
     def confirm_and_delete_course(self, course_id, course_name):
         """Shows a confirmation dialog before deleting a course."""
@@ -221,6 +330,12 @@ class VideoSchedulerGUI(ctk.CTk):
         self.tree.column("status", width=180, anchor="w")
         self.tree.pack(side="left", fill="both", expand=True, padx=5, pady=5)
         self.tree.bind("<Double-1>", self.on_treeview_double_click_show_dialog)
+        self.tree.bind("<<TreeviewOpen>>", self._on_chapter_open)
+
+        # Chapters whose video rows have not been inserted yet, keyed by chapter iid
+        self._unfilled_chapters = {}
+        self._expand_all_job = None
+        self._expand_all_queue = []
 
         # اسکرول‌بار عمودی
         tree_scrollbar = ttk.Scrollbar(treeview_frame, orient="vertical", command=self.tree.yview)
@@ -230,8 +345,10 @@ class VideoSchedulerGUI(ctk.CTk):
     def display_course_info_in_treeview(self, course):
         """Displays course information in the Treeview."""
         # Clear previous content
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self._cancel_expand_all()
+        self.tree.delete(*self.tree.get_children())
+        self._unfilled_chapters = {}
+        self._schedule_hint_update()  # The minimum budget depends on the course and its progress
 
         if course is None:
             self.tree.insert("", "end", text="No course selected", values=("", ""))
@@ -239,23 +356,75 @@ class VideoSchedulerGUI(ctk.CTk):
 
         # Course title and duration
         self.tree.insert("", "end", iid="course_title", text=f"Course: {course.name}", values=("", ""))
-        total_duration = sum(ch.total_duration_seconds for ch in course.chapters)
-        self.tree.insert("", "end", iid="course_duration", text=f"Total Duration: {self._format_time(total_duration)}", values=("", ""))
-
-        # Sort chapters by order
-        sorted_chapters = sorted(course.chapters, key=lambda x: x.order_in_course)
-
-        for chapter in sorted_chapters:
+        # Chapter totals include their subchapters, so the course total is taken from the course row
+        total_duration = course.total_duration_seconds or 0
+        self.tree.insert("", "end", iid="course_duration", text=f"Total Duration: {self._format_time(total_duration)}",
+                         values=("", self._course_progress_text(course)))
+
+        # Chapters and videos are already loaded in course order (see load_course_graph).
+        # Chapters start collapsed, so their video rows are only inserted when first opened.
+        for chapter in course.chapters:
             chapter_id = f"chapter_{chapter.id}"
             chapter_text = f"Chapter {chapter.order_in_course:02d}: {chapter.name}"
-            chapter_node = self.tree.insert("", "end", iid=chapter_id, text=chapter_text, values=(self._format_time(chapter.total_duration_seconds), ""))
-            for video in chapter.videos:
-                video_id = f"vid_{video.id}"
-                status = video.watched_status.value
-                if video.watched_status != WatchedStatusEnum.WATCHED:
-                    progress = (video.watched_seconds / video.duration_seconds) * 100 if video.duration_seconds else 0
-                    status += f" ({progress:.1f}%)"
-                self.tree.insert(chapter_id, "end", iid=video_id, text=video.name, values=(self._format_time(video.duration_seconds), status))
+            self.tree.insert("", "end", iid=chapter_id, text=chapter_text,
+                             values=(self._format_time(chapter.total_duration_seconds),
+                                     self._chapter_progress_text(chapter)))
+            if chapter.videos:
+                self.tree.insert(chapter_id, "end", iid=f"{chapter_id}_placeholder", text="")
+                self._unfilled_chapters[chapter_id] = chapter
+
+    def _on_chapter_open(self, event):
+        """Inserts the video rows of a chapter the first time it is opened."""
+        self._fill_chapter_node(self.tree.focus())
+
+    def _fill_chapter_node(self, chapter_id):
+        """Replaces the placeholder child of a chapter row with its video rows. Returns the number of rows added."""
+        chapter = self._unfilled_chapters.pop(chapter_id, None)
+        if chapter is None:
+            return 0
+        self.tree.delete(f"{chapter_id}_placeholder")
+        for video in chapter.videos:
+            self.tree.insert(chapter_id, "end", iid=f"vid_{video.id}", text=video.name,
+                             values=(self._format_time(video.duration_seconds), self._video_status_text(video)))
+        return len(chapter.videos)
+
+    def update_video_row_in_treeview(self, video):
+        """
+        Updates a video row and its chapter and course summary rows in place after a progress change.
+        Unlike a full redisplay this keeps the scroll position and which chapters are open.
+        """
+        self._schedule_hint_update()  # The minimum budget depends on the progress
+        video_id = f"vid_{video.id}"
+        if self.tree.exists(video_id):
+            self.tree.set(video_id, "status", self._video_status_text(video))
+        chapter_id = f"chapter_{video.chapter_id}"
+        if self.tree.exists(chapter_id):
+            self.tree.set(chapter_id, "status", self._chapter_progress_text(video.chapter))
+        if self.tree.exists("course_duration"):
+            self.tree.set("course_duration", "status", self._course_progress_text(video.chapter.course))
+
+    @staticmethod
+    def _video_status_text(video):
+        """Status column text for a video row, e.g. 'Partially Watched (40.0%)'."""
+        status = video.watched_status.value
+        if video.watched_status != WatchedStatusEnum.WATCHED:
+            progress = (video.watched_seconds / video.duration_seconds) * 100 if video.duration_seconds else 0
+            status += f" ({progress:.1f}%)"
+        return status
+
+    @staticmethod
+    def _chapter_progress_text(chapter):
+        """Status column text for a chapter row from its stored aggregates, e.g. '3/10 watched (34.5%)'."""
+        progress = ((chapter.watched_seconds or 0) / chapter.videos_duration_seconds * 100
+                    if chapter.videos_duration_seconds else 0)
+        return f"{chapter.watched_video_count or 0}/{chapter.video_count or 0} watched ({progress:.1f}%)"
+
+    @staticmethod
+    def _course_progress_text(course):
+        """Status column text for the course summary row from its stored aggregates, e.g. '34.5% watched'."""
+        progress = ((course.watched_seconds or 0) / course.total_duration_seconds * 100
+                    if course.total_duration_seconds else 0)
+        return f"{course.watched_video_count or 0}/{course.video_count or 0} videos, {progress:.1f}% watched"
 
     @staticmethod
     def _toggle_partial_entry_callback(status_variable, label_widget, entry_widget):
@@ -409,75 +578,121 @@ class VideoSchedulerGUI(ctk.CTk):
         )
         save_button.grid(row=0, column=5, sticky="w", padx=(0, 5), pady=5)
 
+        # Scheduling mode
+        mode_label = ctk.CTkLabel(controls_frame, text="Scheduling mode:")
+        mode_label.grid(row=1, column=0, sticky="w", padx=(5, 2), pady=5)
+        self.schedule_mode_var = ctk.StringVar(value=next(iter(SCHEDULE_MODE_LABELS)))
+        schedule_mode_menu = ctk.CTkOptionMenu(controls_frame, values=list(SCHEDULE_MODE_LABELS),
+                                               variable=self.schedule_mode_var, width=240,
+                                               command=lambda _: self._schedule_hint_update())
+        schedule_mode_menu.grid(row=1, column=1, columnspan=3, sticky="w", padx=(0, 10), pady=5)
+
+        # Live hint with the minimum budget / days needed for the entered values
+        self.schedule_hint_label = ctk.CTkLabel(controls_frame, text="", anchor="w", justify="left")
+        self.schedule_hint_label.grid(row=2, column=0, columnspan=6, sticky="w", padx=(5, 5), pady=(0, 5))
+        self._schedule_hint_job = None
+        self.days_entry.bind("<KeyRelease>", lambda _: self._schedule_hint_update())
+        self.minutes_entry.bind("<KeyRelease>", lambda _: self._schedule_hint_update())
+
         # Schedule display directly in the main frame (no extra box)
         schedule_display_container = ctk.CTkFrame(schedule_frame)
         schedule_display_container.grid(row=1, column=0, sticky="nsew", padx=0, pady=0)
         schedule_display_container.grid_rowconfigure(0, weight=1)
         schedule_display_container.grid_columnconfigure(0, weight=1)
 
-        self.schedule_canvas = ctk.CTkCanvas(schedule_display_container)
-        self.schedule_scrollbar = ctk.CTkScrollbar(schedule_display_container, orientation="vertical",
-                                                 command=self.schedule_canvas.yview)
-        self.schedule_scrollable_frame = ctk.CTkFrame(self.schedule_canvas)
-
-        self.schedule_scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.schedule_canvas.configure(
-                scrollregion=self.schedule_canvas.bbox("all")
-            )
-        )
-        self.schedule_canvas.create_window((0, 0), window=self.schedule_scrollable_frame, anchor="nw")
-        self.schedule_canvas.configure(yscrollcommand=self.schedule_scrollbar.set)
-
-        self.schedule_canvas.grid(row=0, column=0, sticky="nsew")
-        self.schedule_scrollbar.grid(row=0, column=1, sticky="ns")
-
-        self.schedule_canvas.bind_all("<MouseWheel>", self._on_schedule_mousewheel)
-        self.schedule_canvas.bind_all("<Shift-MouseWheel>", self._on_schedule_shift_mousewheel)
-
-        # Variable to hold the generated schedule
-        self.generated_schedule = None
+        # A Treeview draws only the rows in view, so long schedules cost no widgets per day or task.
+        # Day rows get a placeholder child; their tasks are inserted when the day is first opened.
+        self.schedule_tree = ttk.Treeview(schedule_display_container, columns=("time", "duration"), selectmode="browse")
+        self.schedule_tree.heading("#0", text="Day / Video", anchor="w")
+        self.schedule_tree.heading("time", text="Time", anchor="w")
+        self.schedule_tree.heading("duration", text="Duration", anchor="w")
+        self.schedule_tree.column("#0", width=480, stretch=ctk.YES, anchor="w")
+        self.schedule_tree.column("time", width=180, anchor="w")
+        self.schedule_tree.column("duration", width=100, anchor="center")
+        self.schedule_tree.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+        self.schedule_tree.bind("<<TreeviewOpen>>", self._on_schedule_day_open)
+
+        schedule_scrollbar = ttk.Scrollbar(schedule_display_container, orient="vertical", command=self.schedule_tree.yview)
+        schedule_scrollbar.grid(row=0, column=1, sticky="ns")
+        self.schedule_tree.configure(yscrollcommand=schedule_scrollbar.set)
+
+        # Tasks of the days whose rows have not been filled yet, keyed by day iid
+        self._unfilled_schedule_days = {}
+
+    def _schedule_hint_update(self):
+        """Schedules a refresh of the minimum-budget hint, restarting the delay on every keystroke."""
+        if not self.schedule_tab_built:
+            return  # Computed when the tab is first shown
+        if self._schedule_hint_job is not None:
+            self.after_cancel(self._schedule_hint_job)
+        self._schedule_hint_job = self.after(SCHEDULE_HINT_DELAY_MS, self._refresh_schedule_hint)
+
+    def _refresh_schedule_hint(self):
+        """Shows the minimum daily minutes for the entered days and the minimum days for the entered minutes."""
+        self._schedule_hint_job = None
+        mode = SCHEDULE_MODE_LABELS[self.schedule_mode_var.get()]
+        hints = []
+        try:
+            num_days = int(self.days_entry.get())
+            required_minutes = self.app_logic.min_daily_minutes(num_days, mode)
+            if required_minutes is not None:
+                hints.append(f"{num_days} days need at least {required_minutes} min/day")
+        except ValueError:
+            pass
+        try:
+            max_daily_minutes = int(float(self.minutes_entry.get().replace(",", ".")))
+            required_days = self.app_logic.min_days(max_daily_minutes, mode)
+            if required_days is not None:
+                hints.append(f"{max_daily_minutes} min/day needs at least {required_days} days")
+        except ValueError:
+            pass
+        self.schedule_hint_label.configure(text="   |   ".join(hints))
 
     def generate_and_display_schedule(self):
         """Generate and display the schedule (without saving)."""
         # Clear previous schedule
-        for widget in self.schedule_scrollable_frame.winfo_children():
-            widget.destroy()
+        self.schedule_tree.delete(*self.schedule_tree.get_children())
+        self._unfilled_schedule_days = {}
 
         num_days = self.days_entry.get()
         max_daily_minutes = self.minutes_entry.get()
 
+        mode = SCHEDULE_MODE_LABELS[self.schedule_mode_var.get()]
+
         # Only generate schedule (do not save)
-        schedule = self.app_logic.generate_schedule(num_days, max_daily_minutes)
+        schedule = self.app_logic.generate_schedule(num_days, max_daily_minutes, mode)
         self.generated_schedule = schedule
 
         if not schedule:
             return
 
         for day_plan in schedule:
-            day_frame = ctk.CTkFrame(self.schedule_scrollable_frame)
-            day_frame.pack(fill="x", padx=5, pady=5)
-
-            day_label = ctk.CTkLabel(
-                day_frame,
-                text=f"Day {day_plan['day']} - Total Time: {day_plan['total_time_minutes']:.1f} minutes",
-                font=("Arial", 14, "bold")
-            )
-            day_label.pack(fill="x", padx=5, pady=5)
-
-            for task in day_plan['tasks']:
-                task_frame = ctk.CTkFrame(day_frame)
-                task_frame.pack(fill="x", padx=10, pady=2)
-
-                start_time = self._format_time(task['start_time'])
-                end_time = self._format_time(task['end_time'])
-                duration = self._format_time(task['duration'])
-
-                task_text = f"{task['chapter_name']} - {task['video_name']}\n"
-                task_text += f"Time: {start_time} to {end_time} (Duration: {duration})"
-
-                task_label = ctk.CTkLabel(task_frame, text=task_text, justify="left")
-                task_label.pack(fill="x", padx=5, pady=2)
+            day_id = f"day_{day_plan['day']}"
+            day_text = f"Day {day_plan['day']} - Total Time: {day_plan['total_time_minutes']:.1f} minutes"
+            self.schedule_tree.insert("", "end", iid=day_id, text=day_text,
+                                      values=("", f"{len(day_plan['tasks'])} videos"))
+            self.schedule_tree.insert(day_id, "end", iid=f"{day_id}_placeholder", text="")
+            self._unfilled_schedule_days[day_id] = day_plan['tasks']
+
+        first_day_id = f"day_{schedule[0]['day']}"
+        self._fill_schedule_day(first_day_id)
+        self.schedule_tree.item(first_day_id, open=True)
+
+    def _on_schedule_day_open(self, event):
+        """Inserts the tasks of a day row the first time it is opened."""
+        self._fill_schedule_day(self.schedule_tree.focus())
+
+    def _fill_schedule_day(self, day_id):
+        """Replaces the placeholder child of a day row with its task rows."""
+        tasks = self._unfilled_schedule_days.pop(day_id, None)
+        if tasks is None:
+            return
+        self.schedule_tree.delete(f"{day_id}_placeholder")
+        for task in tasks:
+            start_time = self._format_time(task['start_time'])
+            end_time = self._format_time(task['end_time'])
+            self.schedule_tree.insert(day_id, "end", text=f"{task['chapter_name']} - {task['video_name']}",
+                                      values=(f"{start_time} to {end_time}", self._format_time(task['duration'])))
 
     def save_schedule_to_db(self):
         """Save the generated schedule to the database."""
@@ -488,19 +703,42 @@ class VideoSchedulerGUI(ctk.CTk):
         max_daily_minutes = self.minutes_entry.get()
         result = self.app_logic.save_schedule(self.generated_schedule, num_days, max_daily_minutes)
         if result:
-            self.show_status_message("Schedule saved successfully.", "info")
+            self.show_status_message(
+                f"Schedule saved successfully ({result['days']} days, {result['tasks']} tasks "
+                f"in {result['seconds'] * 1000:.0f} ms).", "info")
         else:
             self.show_status_message("Error saving schedule!", "error")
 
-    def _on_schedule_mousewheel(self, event):
-        """Handle mouse wheel scrolling for schedule."""
-        if self.schedule_canvas.winfo_height() < self.schedule_scrollable_frame.winfo_height():
-            self.schedule_canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-
-    def _on_schedule_shift_mousewheel(self, event):
-        """Handle shift+mouse wheel scrolling for schedule."""
-        if self.schedule_canvas.winfo_width() < self.schedule_scrollable_frame.winfo_width():
-            self.schedule_canvas.xview_scroll(int(-1 * (event.delta / 120)), "units")
+    def _create_diagnostics_tab(self, parent):
+        """Creates the Diagnostics tab: the last operation's phase timings and counters."""
+        controls_frame = ctk.CTkFrame(parent)
+        controls_frame.pack(fill=ctk.X, padx=10, pady=(10, 5))
+
+        self.profile_next_var = tk.BooleanVar(value=self.app_logic.profile_next_operation)
+        profile_checkbox = ctk.CTkCheckBox(controls_frame, text="Profile the next operation (cProfile)",
+                                           variable=self.profile_next_var, command=self._on_profile_next_toggled)
+        profile_checkbox.pack(side=ctk.LEFT, padx=5, pady=5)
+
+        self.diagnostics_log_label = ctk.CTkLabel(controls_frame, text="", anchor="e", font=ctk.CTkFont(size=10))
+        self.diagnostics_log_label.pack(side=ctk.RIGHT, padx=5, pady=5)
+
+        self.diagnostics_text = ctk.CTkTextbox(parent, wrap="none", font=ctk.CTkFont(family="Courier", size=12))
+        self.diagnostics_text.pack(fill=ctk.BOTH, expand=True, padx=10, pady=(0, 10))
+
+    def _on_profile_next_toggled(self):
+        self.app_logic.profile_next_operation = self.profile_next_var.get()
+
+    def update_diagnostics_panel(self, trace):
+        """Shows an operation trace (see diagnostics.OperationTrace) in the Diagnostics tab, if it has been built."""
+        if not self.diagnostics_tab_built:
+            return  # Shown from app_logic.last_trace when the tab is first opened
+        self.profile_next_var.set(self.app_logic.profile_next_operation)  # Profiling covers one operation
+        self.diagnostics_log_label.configure(text=f"Log: {self.app_logic.get_diagnostics_log_path()}")
+        report = trace.format_report() if trace is not None else "No operation has run yet."
+        self.diagnostics_text.configure(state="normal")
+        self.diagnostics_text.delete("1.0", "end")
+        self.diagnostics_text.insert("1.0", report)
+        self.diagnostics_text.configure(state="disabled")
 
     def _format_time(self, seconds):
         """Formats time in seconds to HH:MM:SS format."""
@@ -520,6 +758,7 @@ class VideoSchedulerGUI(ctk.CTk):
 
     def on_closing_application(self):
         """Handles cleanup when the application window is closed."""
+        self.app_logic.cancel_scan()  # A running scan rolls back its transaction
         self.app_logic.close_db_session()  # Important to close DB session
         self.destroy()  # Close the GUI window
 
@@ -566,46 +805,31 @@ class VideoSchedulerGUI(ctk.CTk):
         """Stop the resize operation"""
         pass
 
+    def _schedule_course_filter(self, *args):
+        """Schedules a course list filter, restarting the delay on every keystroke."""
+        if self._course_filter_job is not None:
+            self.after_cancel(self._course_filter_job)
+        self._course_filter_job = self.after(COURSE_FILTER_DELAY_MS, self.filter_courses)
+
     def filter_courses(self, *args):
-        """Filter courses based on search text"""
+        """Shows the cached course rows whose name contains the search text, hiding the rest"""
+        self._course_filter_job = None
         search_text = self.search_var.get().lower()
-        
-        # Clear previous course list items
-        for widget in self.course_listbox_frame.winfo_children():
-            widget.destroy()
+        if self._course_index:
+            self._no_courses_label.pack_forget()
+        else:
+            self._no_courses_label.pack(pady=5, padx=5)
 
-        courses = self.app_logic.get_all_courses()
-        if not courses:
-            ctk.CTkLabel(self.course_listbox_frame, text="No courses found.").pack(pady=5, padx=5)
+        visible_course_ids = [course['id'] for course in self._course_index if search_text in course['search_key']]
+        if visible_course_ids == self._visible_course_ids:
             return
 
-        for course in courses:
-            if search_text in course.name.lower():
-                # Frame for each course item (button + delete button)
-                course_item_frame = ctk.CTkFrame(self.course_listbox_frame)
-                course_item_frame.pack(fill=ctk.X, pady=(2, 0), padx=2)
-
-                course_button_text = f"{course.name}"
-                if self.app_logic.current_course and self.app_logic.current_course.id == course.id:
-                    course_button_text += " (Current)"
-
-                load_course_button = ctk.CTkButton(
-                    course_item_frame,
-                    text=course_button_text,
-                    anchor="w",
-                    command=lambda c_id=course.id: self.app_logic.load_course_by_id(c_id)
-                )
-                load_course_button.pack(side=ctk.LEFT, fill=ctk.X, expand=True, padx=(0, 2))
-
-                delete_course_button = ctk.CTkButton(
-                    course_item_frame,
-                    text="X",
-                    width=30,
-                    fg_color="red",
-                    hover_color="darkred",
-                    command=lambda c_id=course.id, c_name=course.name: self.confirm_and_delete_course(c_id, c_name)
-                )
-                delete_course_button.pack(side=ctk.RIGHT)
+        # Repack in name order; pack_forget keeps the widgets for when they match again
+        for course_id in self._visible_course_ids:
+            self._course_rows[course_id][0].pack_forget()
+        for course_id in visible_course_ids:
+            self._course_rows[course_id][0].pack(fill=ctk.X, pady=(2, 0), padx=2)
+        self._visible_course_ids = visible_course_ids
 
     def show_progress_dialog(self, title="Processing..."):
         """Shows the progress dialog"""
@@ -624,8 +848,8 @@ class VideoSchedulerGUI(ctk.CTk):
             y = (self.progress_dialog.winfo_screenheight() // 2) - (height // 2)
             self.progress_dialog.geometry(f'{width}x{height}+{x}+{y}')
             
-            # Disable window buttons
-            self.progress_dialog.protocol("WM_DELETE_WINDOW", lambda: None)
+            # Closing the dialog cancels the scan
+            self.progress_dialog.protocol("WM_DELETE_WINDOW", self.app_logic.cancel_scan)
             
             # Add progress bar
             self.progress_label = ctk.CTkLabel(self.progress_dialog, text="Scanning files...", font=ctk.CTkFont(size=12))
@@ -634,6 +858,9 @@ class VideoSchedulerGUI(ctk.CTk):
             self.progress_bar = ctk.CTkProgressBar(self.progress_dialog, width=350)
             self.progress_bar.pack(pady=10, padx=20)
             self.progress_bar.set(0)
+
+            cancel_button = ctk.CTkButton(self.progress_dialog, text="Cancel", width=100, command=self.app_logic.cancel_scan)
+            cancel_button.pack(pady=(0, 10))
             
             # Disable interaction with main window
             self.progress_dialog.focus_set()
@@ -649,21 +876,17 @@ class VideoSchedulerGUI(ctk.CTk):
             self.progress_dialog = None
             self.progress_bar = None
             self.progress_label = None
-            # Force update
-            self.update()
 
     def update_progress(self, value, text=None):
-        """Updates the progress bar value and text"""
-        if self.progress_bar is not None:
+        """Updates the progress bar value (None keeps the current value) and text"""
+        if value is not None and self.progress_bar is not None:
             self.progress_bar.set(value)
         if text and self.progress_label is not None:
             self.progress_label.configure(text=text)
-        # Force update
-        if self.progress_dialog is not None:
-            self.progress_dialog.update()
 
     def collapse_all_tree_items(self):
         """Collapses all items in the treeview"""
+        self._cancel_expand_all()
         for item in self.tree.get_children():
             self.tree.item(item, open=False)
             # Also collapse all children recursively
@@ -676,14 +899,32 @@ class VideoSchedulerGUI(ctk.CTk):
             self._collapse_children(child)
 
     def expand_all_tree_items(self):
-        """Expands all items in the treeview"""
-        for item in self.tree.get_children():
+        """
+        Expands all chapters in the treeview.
+        Unfilled chapters are populated in after() slices of about EXPAND_ALL_ROWS_PER_SLICE rows,
+        so the window keeps responding while a large course expands.
+        """
+        self._cancel_expand_all()
+        self._expand_all_queue = list(self.tree.get_children())
+        self._expand_all_queue.reverse()  # Popped from the end, so chapters open top to bottom
+        self._expand_next_slice()
+
+    def _expand_next_slice(self):
+        """Fills and opens chapters until one slice's row budget is used, then re-arms itself."""
+        self._expand_all_job = None
+        rows_added = 0
+        while self._expand_all_queue and rows_added < EXPAND_ALL_ROWS_PER_SLICE:
+            item = self._expand_all_queue.pop()
+            if not self.tree.exists(item):
+                continue
+            rows_added += self._fill_chapter_node(item)
             self.tree.item(item, open=True)
-            # Also expand all children recursively
-            self._expand_children(item)
-
-    def _expand_children(self, parent):
-        """Recursively expands all children of a tree item"""
-        for child in self.tree.get_children(parent):
-            self.tree.item(child, open=True)
-            self._expand_children(child)
+        if self._expand_all_queue:
+            self._expand_all_job = self.after(1, self._expand_next_slice)
+
+    def _cancel_expand_all(self):
+        """Stops a running expand-all, e.g. when the tree is cleared or collapsed."""
+        if self._expand_all_job is not None:
+            self.after_cancel(self._expand_all_job)
+            self._expand_all_job = None
+        self._expand_all_queue = []
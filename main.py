@@ -1,10 +1,8 @@
 from app_logic import VideoSchedulerAppLogic
-from database import create_db_and_tables
 from gui import VideoSchedulerGUI
 
 if __name__ == "__main__":
-    create_db_and_tables()  # Ensure database and tables exist on startup
-
     app_logic_instance = VideoSchedulerAppLogic()
+    # The GUI sets up the database (app_logic.initialize_database) once its window is on screen
     gui_application = VideoSchedulerGUI(app_logic_instance)
     gui_application.mainloop()
@@ -0,0 +1,393 @@
+# scheduler.py
+
+from bisect import bisect_right
+from math import ceil
+
+import numpy as np
+
+# Remaining amounts below this many seconds are treated as finished and never scheduled
+MIN_TASK_SECONDS = 0.1
+
+# Scheduling modes accepted by VideoSchedulerAppLogic.generate_schedule
+SCHEDULE_MODE_SPLIT = "split"  # Fill every day to the budget, splitting videos across days
+SCHEDULE_MODE_NO_SPLIT = "no_split"  # Whole videos only, days balanced
+SCHEDULE_MODE_CHAPTERS = "chapters"  # Whole videos, days end at chapter boundaries where possible
+SCHEDULE_MODES = (SCHEDULE_MODE_SPLIT, SCHEDULE_MODE_NO_SPLIT, SCHEDULE_MODE_CHAPTERS)
+
+# The balanced modes stop searching for the smallest daily load once it is known to this many seconds
+LOAD_SEARCH_TOLERANCE_SECONDS = 0.5
+# Slack for rounding in running totals when checking whether videos fit into a day
+PACKING_TOLERANCE_SECONDS = 1e-3
+
+
+class ScheduleInput:
+    """
+    Array-backed list of the videos to schedule, in course order, with each video's
+    remaining time (duration - watched) and offset (watched). The scheduling functions
+    do not modify it, so one input can be scheduled and solved for repeatedly.
+    """
+
+    def __init__(self, video_ids, video_names, chapter_names, duration_seconds, watched_seconds, chapter_ids=None):
+        self.video_ids = list(video_ids)
+        self.video_names = list(video_names)
+        self.chapter_names = list(chapter_names)
+        # Chapters are told apart by id where given, since two chapters may share a name
+        self.chapter_ids = list(chapter_ids) if chapter_ids is not None else self.chapter_names
+        durations = np.asarray(duration_seconds, dtype=np.float64)
+        self.offset_seconds = np.array(watched_seconds, dtype=np.float64)
+        self.remaining_seconds = durations - self.offset_seconds
+
+        self._packing_totals = {}
+
+    def __len__(self):
+        return len(self.video_ids)
+
+    def packing_totals(self, keep_chapters=False):
+        """
+        Returns (scheduled_indices, prefix, boundaries, boundary_prefix) for whole-video packing:
+        the indices of videos with time left, the running totals of their remaining seconds
+        (starting at 0) and, with `keep_chapters`, the positions where chapters start (plus the end)
+        with their running totals. Computed once per input.
+        """
+        if keep_chapters not in self._packing_totals:
+            scheduled_indices = np.flatnonzero(self.remaining_seconds >= MIN_TASK_SECONDS)
+            prefix = np.concatenate(([0.0], np.cumsum(self.remaining_seconds[scheduled_indices])))
+            boundaries = boundary_prefix = None
+            if keep_chapters:
+                chapter_keys = [self.chapter_ids[index] for index in scheduled_indices.tolist()]
+                boundaries = np.array([0] + [position for position in range(1, len(chapter_keys))
+                                             if chapter_keys[position] != chapter_keys[position - 1]]
+                                      + [len(chapter_keys)])
+                boundary_prefix = prefix[boundaries]
+            self._packing_totals[keep_chapters] = (scheduled_indices, prefix, boundaries, boundary_prefix)
+        return self._packing_totals[keep_chapters]
+
+
+# Windows up to this many videos are evaluated with scalar arithmetic, which beats NumPy's per-call overhead
+SCALAR_WINDOW_SIZE = 32
+
+
+def _fill_wide_window(schedule_input, remaining, offsets, start_index, end_index, allocated_seconds,
+                      max_daily_seconds, daily_tasks):
+    """
+    Array version of the scalar window loop in schedule_split: adds tasks for the videos of
+    [start_index, end_index) that fit completely into the rest of the day.
+    Returns (next_index, allocated_seconds).
+    """
+    window_remaining = remaining[start_index:end_index]
+    is_finished = window_remaining < MIN_TASK_SECONDS
+    take_seconds = np.where(is_finished, 0.0, window_remaining)
+    # np.cumsum accumulates sequentially, so these totals are bit-identical to a running sum
+    allocated_after = np.cumsum(np.concatenate(([allocated_seconds], take_seconds)))
+    allocated_before = allocated_after[:-1]
+    available = max_daily_seconds - allocated_before
+    fits = np.where(is_finished, allocated_before < max_daily_seconds,
+                    (available >= MIN_TASK_SECONDS) & (window_remaining <= available))
+    stop = len(fits) if fits.all() else int(np.argmin(fits))
+
+    taken = np.flatnonzero(~is_finished[:stop])
+    starts = offsets[start_index:start_index + stop][taken]
+    durations = window_remaining[taken]
+    video_ids, video_names, chapter_names = schedule_input.video_ids, schedule_input.video_names, schedule_input.chapter_names
+    daily_tasks.extend(
+        {
+            "chapter_name": chapter_names[index],
+            "video_name": video_names[index],
+            "start_time": start,
+            "end_time": end,
+            "duration": duration,
+            "video_id": video_ids[index]
+        }
+        for index, start, end, duration in zip((taken + start_index).tolist(), starts.tolist(),
+                                               (starts + durations).tolist(), durations.tolist())
+    )
+    return start_index + stop, float(allocated_after[stop])
+
+
+def schedule_split(schedule_input, num_days, max_daily_minutes):
+    """
+    Fills each day up to `max_daily_minutes`, splitting a video across days when the budget runs out.
+
+    Produces exactly the schedule of the original per-video loop (including its floating point
+    rounding), but finds each day's boundary from cumulative sums instead of stepping through videos:
+    a window up to the estimated boundary is checked exactly, with NumPy when it is wide.
+    Returns (schedule_days, next_index, remaining_videos): the days in
+    the `day`/`tasks`/`total_time_minutes` format, the index of the first video not fully scheduled,
+    and how many videos from there on still have time left.
+    """
+    max_daily_seconds = max_daily_minutes * 60
+    # Working copies: split videos carry their remaining time and offset over to the next day
+    remaining = schedule_input.remaining_seconds.copy()
+    offsets = schedule_input.offset_seconds.copy()
+    # Scalar mirrors of the arrays. Splits only update the mirrors; since a split video is always the
+    # current one, writing it back before array reads keeps the arrays in sync for everything ahead.
+    remaining_list = remaining.tolist()
+    offset_list = offsets.tolist()
+    video_ids, video_names, chapter_names = schedule_input.video_ids, schedule_input.video_names, schedule_input.chapter_names
+    video_count = len(remaining_list)
+    # Running total of schedulable time, used to estimate how far each day reaches
+    estimate_totals = np.cumsum(np.where(remaining < MIN_TASK_SECONDS, 0.0, remaining)).tolist()
+
+    schedule_days = []
+    current_index = 0
+
+    for day_num in range(1, num_days + 1):
+        daily_tasks = []
+        allocated_seconds = 0.0
+
+        while current_index < video_count:
+            current_remaining = remaining_list[current_index]
+            day_start_total = estimate_totals[current_index] - (
+                current_remaining if current_remaining >= MIN_TASK_SECONDS else 0.0)
+            window_end = bisect_right(estimate_totals,
+                                      day_start_total + (max_daily_seconds - allocated_seconds)) + 2
+            if window_end > video_count:
+                window_end = video_count
+            elif window_end <= current_index:
+                window_end = current_index + 1
+
+            if window_end - current_index > SCALAR_WINDOW_SIZE:
+                remaining[current_index] = current_remaining
+                offsets[current_index] = offset_list[current_index]
+                current_index, allocated_seconds = _fill_wide_window(
+                    schedule_input, remaining, offsets, current_index, window_end, allocated_seconds,
+                    max_daily_seconds, daily_tasks)
+            else:
+                for index in range(current_index, window_end):
+                    seconds = remaining_list[index]
+                    if seconds < MIN_TASK_SECONDS:
+                        if allocated_seconds < max_daily_seconds:
+                            continue  # Finished videos are skipped while the day is open
+                        current_index = index
+                        break
+                    available = max_daily_seconds - allocated_seconds
+                    if available < MIN_TASK_SECONDS or seconds > available:
+                        current_index = index
+                        break
+                    start = offset_list[index]
+                    daily_tasks.append({
+                        "chapter_name": chapter_names[index],
+                        "video_name": video_names[index],
+                        "start_time": start,
+                        "end_time": start + seconds,
+                        "duration": seconds,
+                        "video_id": video_ids[index]
+                    })
+                    allocated_seconds += seconds
+                else:
+                    current_index = window_end
+            if current_index == window_end:
+                continue  # The whole window fit; keep filling the day
+
+            # The video at `current_index` does not fit completely: split it if time is left today
+            current_remaining = remaining_list[current_index]
+            available = max_daily_seconds - allocated_seconds
+            if current_remaining < MIN_TASK_SECONDS or available < MIN_TASK_SECONDS:
+                break
+            start = offset_list[current_index]
+            daily_tasks.append({
+                "chapter_name": chapter_names[current_index],
+                "video_name": video_names[current_index],
+                "start_time": start,
+                "end_time": start + available,
+                "duration": available,
+                "video_id": video_ids[current_index]
+            })
+            allocated_seconds += available
+            current_remaining -= available
+            remaining_list[current_index] = current_remaining
+            offset_list[current_index] = start + available
+            if current_remaining < MIN_TASK_SECONDS:
+                current_index += 1
+            if max_daily_seconds - allocated_seconds < MIN_TASK_SECONDS:
+                # The day is full; the original loop still steps past finished videos while below budget
+                while (current_index < video_count and remaining_list[current_index] < MIN_TASK_SECONDS
+                       and allocated_seconds < max_daily_seconds):
+                    current_index += 1
+                break
+
+        if daily_tasks:
+            schedule_days.append({
+                "day": day_num,
+                "tasks": daily_tasks,
+                "total_time_minutes": allocated_seconds / 60
+            })
+
+        if current_index >= video_count:
+            break
+
+    if current_index < video_count:
+        remaining[current_index] = remaining_list[current_index]
+        offsets[current_index] = offset_list[current_index]
+    remaining_videos = int(np.count_nonzero(remaining[current_index:] > MIN_TASK_SECONDS))
+    return schedule_days, current_index, remaining_videos
+
+
+def _pack_days(prefix, capacity, max_days, boundaries=None, boundary_prefix=None):
+    """
+    Greedily packs whole videos into days of at most `capacity` seconds, for at most `max_days` days.
+    `prefix` holds the running totals of the video durations (starting with 0). If `boundaries`
+    (chapter start indices plus the end, with their running totals in `boundary_prefix`) are given,
+    a day ends at the last chapter boundary that fits, and only falls back to ending between videos
+    when not even the next chapter fits. A video longer than `capacity` gets a day of its own.
+    Each day is found with one or two binary searches. Returns the list of day end indices.
+    """
+    video_count = len(prefix) - 1
+    day_ends = []
+    start = 0
+    while start < video_count and len(day_ends) < max_days:
+        limit = prefix[start] + capacity + PACKING_TOLERANCE_SECONDS
+        end = start
+        if boundaries is not None:
+            end = boundaries[int(boundary_prefix.searchsorted(limit, side='right')) - 1]
+        if end <= start:
+            end = int(prefix.searchsorted(limit, side='right')) - 1
+            if end <= start:
+                end = start + 1
+        day_ends.append(int(end))
+        start = end
+    return day_ends
+
+
+def _minimal_daily_load(prefix, longest_video, num_days, boundaries=None, boundary_prefix=None):
+    """
+    Binary search for the smallest daily capacity with which _pack_days fits all videos into
+    `num_days` days. Each step is one greedy packing, so the search costs O(days * log n) per step.
+    """
+    video_count = len(prefix) - 1
+    total_seconds = float(prefix[-1])
+    low = max(total_seconds / num_days, longest_video)
+    high = total_seconds
+
+    def fits(capacity):
+        day_ends = _pack_days(prefix, capacity, num_days, boundaries, boundary_prefix)
+        return day_ends[-1] == video_count
+
+    if fits(low):
+        return low
+    # `high` always fits; narrow the range until it is within the tolerance
+    while high - low > LOAD_SEARCH_TOLERANCE_SECONDS:
+        middle = (low + high) / 2
+        if fits(middle):
+            high = middle
+        else:
+            low = middle
+    return high
+
+
+def schedule_balanced(schedule_input, num_days, max_daily_minutes, keep_chapters=False):
+    """
+    Schedules whole videos (never split) over at most `num_days` days, keeping the longest day as
+    short as possible. With `keep_chapters`, days end at chapter boundaries unless a chapter does
+    not fit into a day on its own.
+
+    The smallest feasible daily load is found by a binary search over greedy packings. If it exceeds
+    `max_daily_minutes`, days are filled up to the budget instead and the rest is left unscheduled.
+    Returns (schedule_days, next_index, remaining_videos) like schedule_split.
+    """
+    remaining = schedule_input.remaining_seconds
+    video_count = len(remaining)
+    scheduled_indices, prefix, boundaries, boundary_prefix = schedule_input.packing_totals(keep_chapters)
+    if not len(scheduled_indices):
+        return [], video_count, 0
+
+    max_daily_seconds = max_daily_minutes * 60
+    longest_video = float(np.max(remaining[scheduled_indices]))
+    capacity = min(_minimal_daily_load(prefix, longest_video, num_days, boundaries, boundary_prefix),
+                   max_daily_seconds)
+    day_ends = _pack_days(prefix, capacity, num_days, boundaries, boundary_prefix)
+
+    offsets = schedule_input.offset_seconds
+    video_ids, video_names, chapter_names = schedule_input.video_ids, schedule_input.video_names, schedule_input.chapter_names
+    schedule_days = []
+    day_start = 0
+    for day_num, day_end in enumerate(day_ends, start=1):
+        indices = scheduled_indices[day_start:day_end]
+        starts = offsets[indices]
+        durations = remaining[indices]
+        schedule_days.append({
+            "day": day_num,
+            "tasks": [
+                {
+                    "chapter_name": chapter_names[index],
+                    "video_name": video_names[index],
+                    "start_time": start,
+                    "end_time": end,
+                    "duration": duration,
+                    "video_id": video_ids[index]
+                }
+                for index, start, end, duration in zip(indices.tolist(), starts.tolist(),
+                                                       (starts + durations).tolist(), durations.tolist())
+            ],
+            "total_time_minutes": float(prefix[day_end] - prefix[day_start]) / 60
+        })
+        day_start = day_end
+
+    next_index = int(scheduled_indices[day_start]) if day_start < len(scheduled_indices) else video_count
+    remaining_videos = len(scheduled_indices) - day_start
+    return schedule_days, next_index, remaining_videos
+
+
+def _split_finishes(schedule_input, num_days, max_daily_minutes):
+    return schedule_split(schedule_input, num_days, max_daily_minutes)[2] == 0
+
+
+def _smallest_passing(low, high, passes):
+    """Binary search for the smallest value in [low, high] for which `passes` holds; `passes(high)` must hold."""
+    while low < high:
+        middle = (low + high) // 2
+        if passes(middle):
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+def minimum_daily_minutes(schedule_input, num_days, mode=SCHEDULE_MODE_SPLIT):
+    """
+    Smallest whole number of daily minutes with which `mode` schedules every video within
+    `num_days` days, or None if nothing is left to schedule.
+    """
+    scheduled_indices, prefix, boundaries, boundary_prefix = schedule_input.packing_totals(
+        mode == SCHEDULE_MODE_CHAPTERS)
+    if not len(scheduled_indices):
+        return None
+    total_seconds = float(prefix[-1])
+
+    if mode == SCHEDULE_MODE_SPLIT:
+        # Every day but the last is filled to within MIN_TASK_SECONDS of the budget, and a video split
+        # at the end of a day drops a remainder shorter than MIN_TASK_SECONDS, so a day covers within
+        # MIN_TASK_SECONDS of the budget. That leaves at most a few candidates, checked with trial runs.
+        low = max(1, ceil((total_seconds / num_days - MIN_TASK_SECONDS) / 60))
+        high = ceil((total_seconds / num_days + MIN_TASK_SECONDS) / 60)
+        return _smallest_passing(low, high, lambda minutes: _split_finishes(schedule_input, num_days, minutes))
+
+    # Whole videos: binary search over the budget, each step one greedy packing
+    longest_video = float(np.max(schedule_input.remaining_seconds[scheduled_indices]))
+    low = ceil(max(total_seconds / num_days, longest_video) / 60)
+    high = max(low, ceil(total_seconds / 60))
+    return _smallest_passing(low, high, lambda minutes: _pack_days(
+        prefix, minutes * 60, num_days, boundaries, boundary_prefix)[-1] == len(scheduled_indices))
+
+
+def minimum_days(schedule_input, max_daily_minutes, mode=SCHEDULE_MODE_SPLIT):
+    """
+    Smallest number of days in which `mode` schedules every video with `max_daily_minutes` per day,
+    or None if nothing is left to schedule. In the whole-video modes a video longer than the
+    budget still takes one day of its own.
+    """
+    scheduled_indices, prefix, boundaries, boundary_prefix = schedule_input.packing_totals(
+        mode == SCHEDULE_MODE_CHAPTERS)
+    if not len(scheduled_indices):
+        return None
+    max_daily_seconds = max_daily_minutes * 60
+
+    if mode == SCHEDULE_MODE_SPLIT:
+        # As in minimum_daily_minutes, each day covers within MIN_TASK_SECONDS of the budget
+        total_seconds = float(prefix[-1])
+        low = ceil(total_seconds / (max_daily_seconds + MIN_TASK_SECONDS))
+        high = ceil(total_seconds / (max_daily_seconds - MIN_TASK_SECONDS))
+        return _smallest_passing(low, high, lambda days: _split_finishes(schedule_input, days, max_daily_minutes))
+
+    # The greedy packing is optimal for a fixed budget when videos stay in order
+    return len(_pack_days(prefix, max_daily_seconds, len(scheduled_indices), boundaries, boundary_prefix))
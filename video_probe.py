@@ -0,0 +1,493 @@
+# video_probe.py
+
+import struct
+import uuid
+
+# How many bytes to read when sniffing the container signature
+SNIFF_SIZE = 16
+# Upper bound for any metadata blob we are willing to read into memory
+MAX_METADATA_READ = 64 * 1024
+
+# --- Matroska / WebM (EBML) element IDs ---
+EBML_HEADER_ID = 0x1A45DFA3
+EBML_SEGMENT_ID = 0x18538067
+EBML_SEEKHEAD_ID = 0x114D9B74
+EBML_SEEK_ID = 0x4DBB
+EBML_SEEK_ID_ID = 0x53AB
+EBML_SEEK_POSITION_ID = 0x53AC
+EBML_INFO_ID = 0x1549A966
+EBML_TIMECODE_SCALE_ID = 0x2AD7B1
+EBML_DURATION_ID = 0x4489
+EBML_CLUSTER_ID = 0x1F43B675
+
+# --- ASF / WMV object GUIDs (stored little-endian on disk) ---
+ASF_HEADER_GUID = uuid.UUID('75B22630-668E-11CF-A6D9-00AA0062CE6C').bytes_le
+ASF_FILE_PROPERTIES_GUID = uuid.UUID('8CABDCA1-A947-11CF-8EE4-00C00C205365').bytes_le
+
+
+def probe_duration(video_path):
+    """
+    Reads the duration straight from the container metadata without decoding anything.
+    Supports MP4/MOV, Matroska/WebM, AVI, FLV and ASF/WMV.
+    Returns duration in seconds (float) or None if the file could not be parsed.
+    """
+    try:
+        with open(video_path, 'rb') as f:
+            head = f.read(SNIFF_SIZE)
+            f.seek(0)
+            parser = _select_parser(head)
+            if parser is None:
+                return None
+            duration = parser(f)
+    except (OSError, ValueError, struct.error):
+        return None
+
+    if duration is None or duration != duration or duration <= 0:  # Rejects NaN as well
+        return None
+    return float(duration)
+
+
+def _select_parser(head):
+    """Picks a container parser based on the file signature (extensions are not trusted)."""
+    if len(head) < 12:
+        return None
+    if head[4:8] in (b'ftyp', b'moov', b'mdat', b'free', b'skip', b'wide', b'pnot'):
+        return _probe_mp4
+    if head[:4] == b'\x1a\x45\xdf\xa3':
+        return _probe_matroska
+    if head[:4] == b'RIFF' and head[8:12] == b'AVI ':
+        return _probe_avi
+    if head[:3] == b'FLV':
+        return _probe_flv
+    if head[:16] == ASF_HEADER_GUID:
+        return _probe_asf
+    return None
+
+
+def _read_exact(f, size):
+    """Reads exactly `size` bytes or raises ValueError on a truncated file."""
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("Unexpected end of file")
+    return data
+
+
+def _file_size(f):
+    """Returns the size of an open file without moving the current position."""
+    position = f.tell()
+    size = f.seek(0, 2)
+    f.seek(position)
+    return size
+
+
+# --- MP4 / MOV ---
+
+def _iter_mp4_boxes(f, start, end):
+    """Yields (type, payload_offset, payload_size) for every box in [start, end), seeking over payloads."""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        size, box_type = struct.unpack('>I4s', _read_exact(f, 8))
+        header_size = 8
+        if size == 1:  # 64-bit largesize follows the type
+            size = struct.unpack('>Q', _read_exact(f, 8))[0]
+            header_size = 16
+        elif size == 0:  # Box extends to the end of the file
+            size = end - offset
+        if size < header_size:
+            raise ValueError(f"Invalid MP4 box size {size}")
+        yield box_type, offset + header_size, size - header_size
+        offset += size
+
+
+def _find_mp4_box(f, start, end, box_type):
+    for found_type, payload_offset, payload_size in _iter_mp4_boxes(f, start, end):
+        if found_type == box_type:
+            return payload_offset, payload_size
+    return None
+
+
+def _probe_mp4(f):
+    """Reads moov/mvhd. Only box headers are read, so a moov at the file tail costs one seek over mdat."""
+    file_size = _file_size(f)
+    moov = _find_mp4_box(f, 0, file_size, b'moov')
+    if moov is None:
+        return None
+    moov_offset, moov_size = moov
+    moov_end = moov_offset + moov_size
+
+    duration = None
+    mvhd = _find_mp4_box(f, moov_offset, moov_end, b'mvhd')
+    if mvhd is not None:
+        f.seek(mvhd[0])
+        version = _read_exact(f, 4)[0]
+        if version == 1:
+            timescale, raw_duration = struct.unpack('>IQ', _read_exact(f, 28)[16:])
+            unknown = raw_duration == 0xFFFFFFFFFFFFFFFF
+        else:
+            timescale, raw_duration = struct.unpack('>II', _read_exact(f, 16)[8:])
+            unknown = raw_duration == 0xFFFFFFFF
+        if timescale and raw_duration and not unknown:
+            duration = raw_duration / timescale
+
+        # Fragmented MP4 leaves mvhd empty and stores the total in mvex/mehd
+        if not duration and timescale:
+            mvex = _find_mp4_box(f, moov_offset, moov_end, b'mvex')
+            mehd = _find_mp4_box(f, mvex[0], mvex[0] + mvex[1], b'mehd') if mvex else None
+            if mehd is not None:
+                f.seek(mehd[0])
+                mehd_version = _read_exact(f, 4)[0]
+                fmt = '>Q' if mehd_version == 1 else '>I'
+                fragment_duration = struct.unpack(fmt, _read_exact(f, struct.calcsize(fmt)))[0]
+                duration = fragment_duration / timescale
+    return duration
+
+
+# --- Matroska / WebM ---
+
+def _read_ebml_id(f):
+    """Reads an EBML element ID (length marker bits are kept, as in the spec tables)."""
+    first = _read_exact(f, 1)[0]
+    length = _ebml_vint_length(first)
+    if length > 4:
+        raise ValueError("Invalid EBML element ID")
+    value = first
+    for byte in _read_exact(f, length - 1):
+        value = (value << 8) | byte
+    return value
+
+
+def _read_ebml_size(f):
+    """Reads an EBML data size. Returns None for the reserved 'unknown size' value."""
+    first = _read_exact(f, 1)[0]
+    length = _ebml_vint_length(first)
+    value = first & (0xFF >> length)
+    all_ones = value == (0xFF >> length)
+    for byte in _read_exact(f, length - 1):
+        value = (value << 8) | byte
+        all_ones = all_ones and byte == 0xFF
+    return None if all_ones else value
+
+
+def _ebml_vint_length(first_byte):
+    if first_byte == 0:
+        raise ValueError("Invalid EBML variable-length integer")
+    length = 1
+    mask = 0x80
+    while not first_byte & mask:
+        mask >>= 1
+        length += 1
+    return length
+
+
+def _read_ebml_uint(f, size):
+    value = 0
+    for byte in _read_exact(f, size):
+        value = (value << 8) | byte
+    return value
+
+
+def _probe_matroska(f):
+    """Walks Segment children up to Info, jumping there through the SeekHead when it is listed."""
+    file_size = _file_size(f)
+
+    # EBML header
+    if _read_ebml_id(f) != EBML_HEADER_ID:
+        return None
+    header_size = _read_ebml_size(f)
+    if header_size is None:
+        return None
+    f.seek(header_size, 1)
+
+    if _read_ebml_id(f) != EBML_SEGMENT_ID:
+        return None
+    segment_size = _read_ebml_size(f)
+    segment_start = f.tell()
+    segment_end = file_size if segment_size is None else min(file_size, segment_start + segment_size)
+
+    position = segment_start
+    while position < segment_end:
+        f.seek(position)
+        element_id = _read_ebml_id(f)
+        element_size = _read_ebml_size(f)
+        data_start = f.tell()
+        if element_id == EBML_INFO_ID:
+            return _parse_matroska_info(f, data_start, element_size)
+        if element_id == EBML_SEEKHEAD_ID and element_size is not None:
+            info_position = _find_matroska_seek_entry(f, data_start, element_size, EBML_INFO_ID)
+            if info_position is not None:
+                f.seek(segment_start + info_position)
+                if _read_ebml_id(f) == EBML_INFO_ID:
+                    info_size = _read_ebml_size(f)
+                    return _parse_matroska_info(f, f.tell(), info_size)
+        if element_size is None or element_id == EBML_CLUSTER_ID:
+            # Media data reached without an Info element in front of it
+            return None
+        position = data_start + element_size
+    return None
+
+
+def _find_matroska_seek_entry(f, start, size, wanted_id):
+    """Returns the segment-relative position of `wanted_id` from a SeekHead, if present."""
+    end = start + min(size, MAX_METADATA_READ)
+    position = start
+    while position < end:
+        f.seek(position)
+        element_id = _read_ebml_id(f)
+        element_size = _read_ebml_size(f)
+        if element_size is None:
+            return None
+        data_start = f.tell()
+        if element_id == EBML_SEEK_ID:
+            seek_id = None
+            seek_position = None
+            child = data_start
+            while child < data_start + element_size:
+                f.seek(child)
+                child_id = _read_ebml_id(f)
+                child_size = _read_ebml_size(f)
+                if child_size is None:
+                    return None
+                child_start = f.tell()
+                if child_id == EBML_SEEK_ID_ID:
+                    seek_id = _read_ebml_uint(f, child_size)
+                elif child_id == EBML_SEEK_POSITION_ID:
+                    seek_position = _read_ebml_uint(f, child_size)
+                child = child_start + child_size
+            if seek_id == wanted_id and seek_position is not None:
+                return seek_position
+        position = data_start + element_size
+    return None
+
+
+def _parse_matroska_info(f, start, size):
+    """Reads TimecodeScale and Duration from a Segment Info element."""
+    if size is None:
+        return None
+    timecode_scale = 1000000  # Default: timestamps in milliseconds
+    duration = None
+    end = start + min(size, MAX_METADATA_READ)
+    position = start
+    while position < end:
+        f.seek(position)
+        element_id = _read_ebml_id(f)
+        element_size = _read_ebml_size(f)
+        if element_size is None:
+            break
+        data_start = f.tell()
+        if element_id == EBML_TIMECODE_SCALE_ID:
+            timecode_scale = _read_ebml_uint(f, element_size)
+        elif element_id == EBML_DURATION_ID:
+            if element_size == 4:
+                duration = struct.unpack('>f', _read_exact(f, 4))[0]
+            elif element_size == 8:
+                duration = struct.unpack('>d', _read_exact(f, 8))[0]
+        position = data_start + element_size
+    if duration is None:
+        return None
+    return duration * timecode_scale / 1e9
+
+
+# --- AVI ---
+
+def _probe_avi(f):
+    """Reads the main AVI header (avih); OpenDML files override the frame count via odml/dmlh."""
+    f.seek(12)
+    riff_type, list_size, list_type = struct.unpack('<4sI4s', _read_exact(f, 12))
+    if riff_type != b'LIST' or list_type != b'hdrl':
+        return None
+    hdrl_end = f.tell() - 4 + list_size
+
+    micro_sec_per_frame = None
+    total_frames = None
+    odml_total_frames = None
+    position = f.tell()
+    while position + 8 <= hdrl_end:
+        f.seek(position)
+        chunk_id, chunk_size = struct.unpack('<4sI', _read_exact(f, 8))
+        if chunk_id == b'avih':
+            avih = _read_exact(f, 20)
+            micro_sec_per_frame = struct.unpack('<I', avih[0:4])[0]
+            total_frames = struct.unpack('<I', avih[16:20])[0]
+        elif chunk_id == b'LIST' and _read_exact(f, 4) == b'odml':
+            # Look for dmlh inside the odml list
+            sub_position = position + 12
+            sub_end = position + 8 + chunk_size
+            while sub_position + 8 <= sub_end:
+                f.seek(sub_position)
+                sub_id, sub_size = struct.unpack('<4sI', _read_exact(f, 8))
+                if sub_id == b'dmlh':
+                    odml_total_frames = struct.unpack('<I', _read_exact(f, 4))[0]
+                    break
+                sub_position += 8 + sub_size + (sub_size & 1)
+        position += 8 + chunk_size + (chunk_size & 1)  # Chunks are word-aligned
+
+    frames = odml_total_frames or total_frames
+    if not micro_sec_per_frame or not frames:
+        return None
+    return frames * micro_sec_per_frame / 1e6
+
+
+# --- FLV ---
+
+AMF0_NUMBER = 0x00
+AMF0_BOOLEAN = 0x01
+AMF0_STRING = 0x02
+AMF0_OBJECT = 0x03
+AMF0_NULL = 0x05
+AMF0_UNDEFINED = 0x06
+AMF0_REFERENCE = 0x07
+AMF0_ECMA_ARRAY = 0x08
+AMF0_OBJECT_END = 0x09
+AMF0_STRICT_ARRAY = 0x0A
+AMF0_DATE = 0x0B
+AMF0_LONG_STRING = 0x0C
+
+FLV_SCRIPT_TAG = 18
+
+
+def _probe_flv(f):
+    """Reads `duration` from the onMetaData script tag, falling back to the last tag timestamp."""
+    header = _read_exact(f, 9)
+    data_offset = struct.unpack('>I', header[5:9])[0]
+    f.seek(data_offset + 4)  # Skip PreviousTagSize0
+
+    tag_header = f.read(11)
+    if len(tag_header) == 11 and tag_header[0] & 0x1F == FLV_SCRIPT_TAG:
+        data_size = int.from_bytes(tag_header[1:4], 'big')
+        duration = _parse_flv_metadata(_read_exact(f, min(data_size, MAX_METADATA_READ)))
+        if duration:
+            return duration
+    return _flv_last_timestamp(f)
+
+
+def _parse_flv_metadata(data):
+    reader = _AMF0Reader(data)
+    if reader.read_value() != 'onMetaData':
+        return None
+    marker = reader.read_byte()
+    if marker == AMF0_ECMA_ARRAY:
+        reader.skip(4)  # Approximate entry count, not reliable
+    elif marker != AMF0_OBJECT:
+        return None
+    while reader.remaining() >= 3:
+        key = reader.read_utf8(reader.read_u16())
+        if not key and reader.peek_byte() == AMF0_OBJECT_END:
+            break
+        value = reader.read_value()
+        if key == 'duration' and isinstance(value, float):
+            return value
+    return None
+
+
+def _flv_last_timestamp(f):
+    """Uses the trailing PreviousTagSize to jump to the final tag and read its timestamp (ms)."""
+    file_size = _file_size(f)
+    if file_size < 15:
+        return None
+    f.seek(file_size - 4)
+    last_tag_size = struct.unpack('>I', _read_exact(f, 4))[0]
+    if last_tag_size < 11 or last_tag_size > file_size - 4:
+        return None
+    f.seek(file_size - 4 - last_tag_size)
+    tag_header = _read_exact(f, 11)
+    timestamp = int.from_bytes(tag_header[4:7], 'big') | (tag_header[7] << 24)
+    return timestamp / 1000.0
+
+
+class _AMF0Reader:
+    """Minimal AMF0 decoder: enough to read top-level onMetaData values and skip nested ones."""
+
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+
+    def remaining(self):
+        return len(self.data) - self.position
+
+    def skip(self, size):
+        if size > self.remaining():
+            raise ValueError("Truncated AMF0 data")
+        self.position += size
+
+    def _take(self, size):
+        start = self.position
+        self.skip(size)
+        return self.data[start:self.position]
+
+    def peek_byte(self):
+        if not self.remaining():
+            raise ValueError("Truncated AMF0 data")
+        return self.data[self.position]
+
+    def read_byte(self):
+        return self._take(1)[0]
+
+    def read_u16(self):
+        return struct.unpack('>H', self._take(2))[0]
+
+    def read_utf8(self, size):
+        return self._take(size).decode('utf-8', errors='replace')
+
+    def read_value(self):
+        marker = self.read_byte()
+        if marker == AMF0_NUMBER:
+            return struct.unpack('>d', self._take(8))[0]
+        if marker == AMF0_BOOLEAN:
+            return bool(self.read_byte())
+        if marker == AMF0_STRING:
+            return self.read_utf8(self.read_u16())
+        if marker == AMF0_LONG_STRING:
+            return self.read_utf8(struct.unpack('>I', self._take(4))[0])
+        if marker in (AMF0_OBJECT, AMF0_ECMA_ARRAY):
+            if marker == AMF0_ECMA_ARRAY:
+                self.skip(4)
+            self._skip_properties()
+            return None
+        if marker == AMF0_STRICT_ARRAY:
+            for _ in range(struct.unpack('>I', self._take(4))[0]):
+                self.read_value()
+            return None
+        if marker == AMF0_DATE:
+            self.skip(10)
+            return None
+        if marker == AMF0_REFERENCE:
+            self.skip(2)
+            return None
+        if marker in (AMF0_NULL, AMF0_UNDEFINED):
+            return None
+        raise ValueError(f"Unsupported AMF0 marker {marker}")
+
+    def _skip_properties(self):
+        while True:
+            key_size = self.read_u16()
+            if key_size == 0 and self.peek_byte() == AMF0_OBJECT_END:
+                self.skip(1)
+                return
+            self.skip(key_size)
+            self.read_value()
+
+
+# --- ASF / WMV ---
+
+def _probe_asf(f):
+    """Reads the play duration (100ns units, minus preroll) from the ASF File Properties Object."""
+    header_guid, header_size, object_count = struct.unpack('<16sQI', _read_exact(f, 28))
+    if header_guid != ASF_HEADER_GUID:
+        return None
+    f.seek(2, 1)  # Reserved bytes
+    header_end = header_size
+    position = f.tell()
+    for _ in range(object_count):
+        if position + 24 > header_end:
+            break
+        f.seek(position)
+        object_guid, object_size = struct.unpack('<16sQ', _read_exact(f, 24))
+        if object_guid == ASF_FILE_PROPERTIES_GUID:
+            properties = _read_exact(f, 64)
+            play_duration, _send_duration, preroll = struct.unpack('<QQQ', properties[40:64])
+            return play_duration / 1e7 - preroll / 1000.0
+        if object_size < 24:
+            break
+        position += object_size
+    return None